@@ -1,18 +1,27 @@
+import hashlib
+import hmac
 import os
-import io
-import re
-import PyPDF2 as pdf
+import secrets
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
-import google.generativeai as genai
-from fpdf import FPDF
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-import pandas as pd
 from datetime import datetime
-from difflib import SequenceMatcher
-from PIL import Image
+from functools import partial
+from bundle import Exporter
+from extraction import ExtractionError, extract_text
+from history_store import HistoryStore
+from instrumentation import stage, summarize
+from jobs import ACTIVE, DEFAULT_WORKERS as DEFAULT_JOB_WORKERS, JobRunner, job_progress
+from llm import (
+    DEFAULT_MAX_CONCURRENCY, DEFAULT_RPM, DEFAULT_TPM, configure_limits, current_session, get_cache,
+    set_api_key,
+)
+from pipeline import SECTION_LABELS, compute_metrics, report_sections
+from prefetch import Prefetcher
+from ranking import COLUMNS as RANK_COLUMNS, Ranker
+from reports import generate_pdf_simple, generate_structured_docx, generate_structured_pdf
+from session_link import sign, verify
+from session_memory import SessionMemory
 
 # 1) Page setup
 st.set_page_config(page_title="PathPinpoint", page_icon="📍", layout="wide")
@@ -26,196 +35,180 @@ API_KEY = st.secrets.get("GOOGLE_API_KEY", "")
 if not API_KEY:
     st.error("API key missing in Streamlit secrets")
 else:
-    genai.configure(api_key=API_KEY)
-# 2) Text cleaning
-def latin1_clean(text: str) -> str:
-    replacements = {
-        "\u2022": "-", "\u2013": "-", "\u2014": "-",
-        "\u2018": "'", "\u2019": "'", "\u201c": '"',
-        "\u201d": '"', "\u2026": "..."
-    }
-    for orig, repl in replacements.items():
-        text = text.replace(orig, repl)
-    # drop anything else non-Latin-1
-    return text.encode("latin-1", "ignore").decode("latin-1", "ignore")
-# ─── 2a) Helper to strip Markdown before output ───────────────────────────────
-def strip_markdown(text: str) -> str:
-    # remove Markdown headers like “## ”
-    text = re.sub(r"^#{1,6}\s*", "", text, flags=re.MULTILINE)
-    # remove bold/italic markers
-    text = text.replace("**", "").replace("__", "")
-    # normalize bullet markers to a single “• ”
-    text = re.sub(r"^[\-\*\+]\s*", "• ", text, flags=re.MULTILINE)
-    return text
-# 3) Simple PDF for quick dumps
-def generate_pdf_simple(text: str) -> bytes:
-    pdf_obj = FPDF()
-    pdf_obj.add_page()
-    pdf_obj.set_auto_page_break(True, 15)
-    pdf_obj.set_font("Arial", size=12)
-
-    cleaned = strip_markdown(text)               # ← apply here
-    for line in cleaned.splitlines():
-        pdf_obj.multi_cell(0, 8, latin1_clean(line))
-    return pdf_obj.output(dest="S").encode("latin-1")
-
-
-# 4) Structured DOCX
-def generate_structured_docx(metrics, recs, tailored, cover, interview, skill_gap, roles, salary, networking):
-    # strip Markdown from each block
-    recs      = strip_markdown(recs)
-    tailored  = strip_markdown(tailored)
-    cover     = strip_markdown(cover)
-    interview = strip_markdown(interview)
-    skill_gap = strip_markdown(skill_gap)
-    roles     = strip_markdown(roles)
-    salary    = strip_markdown(salary)
-    networking= strip_markdown(networking)
-
-
-    doc = Document()
-    # Title
-    t = doc.add_heading("PathPinpoint Full Report", level=0)
-    t.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-
-    # Scores Table
-    doc.add_heading("ATS & Similarity Scores", level=1)
-    table = doc.add_table(rows=1, cols=2)
-    hdr = table.rows[0].cells
-    hdr[0].text, hdr[1].text = "Metric", "Value"
-    for label, value in metrics:
-        row = table.add_row().cells
-        row[0].text, row[1].text = label, value
-
-    # Recommendations
-    doc.add_heading("Recommendations", level=1)
-    for line in recs.splitlines():
-        p = doc.add_paragraph(line.lstrip("- ").strip())
-        p.style = "List Bullet"
-
-    # Tailored Resume
-    doc.add_heading("AI-Tailored Resume", level=1)
-    for line in tailored.splitlines():
-        doc.add_paragraph(line)
-
-    # Cover Letter
-    doc.add_heading("Cover Letter", level=1)
-    for line in cover.splitlines():
-        doc.add_paragraph(line)
-
-    # Interview Prep Questions
-    doc.add_heading("Interview Prep Questions", level=1)
-    for line in interview.splitlines():
-        p = doc.add_paragraph(line.lstrip("- ").strip())
-        p.style = "List Number"
-
-    # Skill Gap Analysis
-    doc.add_heading("Skill Gap Analysis", level=1)
-    for line in skill_gap.splitlines():
-        doc.add_paragraph(line)
-
-    # Related Roles
-    doc.add_heading("Related Roles", level=1)
-    for line in roles.splitlines():
-        p = doc.add_paragraph(line.lstrip("- ").strip())
-        p.style = "List Bullet"
-
-    # Salary Estimate
-    doc.add_heading("Salary Estimate", level=1)
-    doc.add_paragraph(salary)
-
-    # Networking Tips
-    doc.add_heading("Networking Tips", level=1)
-    for line in networking.splitlines():
-        p = doc.add_paragraph(line.lstrip("- ").strip())
-        p.style = "List Bullet"
-
-    buf = io.BytesIO()
-    doc.save(buf)
-    return buf.getvalue()
-
-# 5) Structured PDF
-def generate_structured_pdf(metrics, recs, tailored, cover, interview, skill_gap, roles, salary, networking):
-    # strip Markdown first
-    recs       = strip_markdown(recs)
-    tailored   = strip_markdown(tailored)
-    cover      = strip_markdown(cover)
-    interview  = strip_markdown(interview)
-    skill_gap  = strip_markdown(skill_gap)
-    roles      = strip_markdown(roles)
-    salary     = strip_markdown(salary)
-    networking = strip_markdown(networking)
-    pdf_obj = FPDF()
-    pdf_obj.add_page()
-    pdf_obj.set_font("Arial", "B", 16)
-    pdf_obj.cell(0, 10, latin1_clean("PathPinpoint Full Report"), ln=True, align="C")
-    pdf_obj.ln(5)
-
-    # effective page width
-    epw = pdf_obj.w - 2 * pdf_obj.l_margin
-    col_w = epw / 2
-
-    # Scores table
-    pdf_obj.set_font("Arial", "B", 14)
-    pdf_obj.cell(0, 8, latin1_clean("ATS & Similarity Scores"), ln=True)
-    pdf_obj.set_font("Arial", "", 12)
-    pdf_obj.cell(col_w, 8, latin1_clean("Metric"), border=1)
-    pdf_obj.cell(col_w, 8, latin1_clean("Value"), border=1, ln=True)
-    for label, value in metrics:
-        pdf_obj.cell(col_w, 8, latin1_clean(label), border=1)
-        pdf_obj.cell(col_w, 8, latin1_clean(value), border=1, ln=True)
-    pdf_obj.ln(5)
-
-    def add_section(title, body, bullet=False, numbered=False):
-        pdf_obj.set_font("Arial", "B", 14)
-        pdf_obj.cell(0, 8, latin1_clean(title), ln=True)
-        pdf_obj.set_font("Arial", "", 12)
-        for idx, line in enumerate(body.splitlines()):
-            prefix = ""
-            if numbered:
-                prefix = f"{idx+1}. "
-            elif bullet:
-                prefix = "- "
-            pdf_obj.multi_cell(0, 6, latin1_clean(prefix + line))
-        pdf_obj.ln(3)
-
-    add_section("Recommendations", recs, bullet=True)
-    add_section("AI-Tailored Resume", tailored)
-    add_section("Cover Letter", cover)
-    add_section("Interview Prep Questions", interview, numbered=True)
-    add_section("Skill Gap Analysis", skill_gap)
-    add_section("Related Roles", roles, bullet=True)
-    add_section("Salary Estimate", salary)
-    add_section("Networking Tips", networking, bullet=True)
-
-    return pdf_obj.output(dest="S").encode("latin-1")
-
-# 6) Extract section helper
-def extract_section(full, header):
-    lines, out, cap = full.splitlines(), [], False
-    key = header.lower()
-    for ln in lines:
-        txt = ln.lstrip("- ").strip()
-        if cap:
-            if txt.lower().startswith("- "):
-                break
-            out.append(txt)
-        elif txt.lower().startswith(key):
-            cap = True
-    return "\n".join(out).strip()
-
-# 7) Session state
-if "history" not in st.session_state:
-    st.session_state.history = []
-for k in [
-    "resume_text","jd_text","analysis","recommendations","tailored",
-    "cover_letter","interview_qs","skill_gap",
-    "related_roles","salary_estimate","networking_tips"
-]:
-    if k not in st.session_state:
-        st.session_state[k] = ""
-
-# 8) Styling & navbar
+    # the Gemini SDK itself is imported and configured on the first LLM call
+    set_api_key(API_KEY)
+
+# Rate limits are process-wide, so configure them once, not on every rerun
+@st.cache_resource
+def configure_llm_limits(rpm, tpm):
+    configure_limits(rpm, tpm)
+
+configure_llm_limits(int(st.secrets.get("LLM_RPM", DEFAULT_RPM)), int(st.secrets.get("LLM_TPM", DEFAULT_TPM)))
+@st.cache_resource
+def link_secret():
+    # without a SESSION_SECRET, links stop working when the process restarts
+    return st.secrets.get("SESSION_SECRET") or secrets.token_hex(32)
+
+if "session_id" not in st.session_state:
+    # the URL carries a signed, expiring link (not the bare ID), so a page reload comes back to the
+    # same History table; it never reopens the session's jobs or their texts
+    st.session_state.session_id = verify(st.query_params.get("sid"), link_secret()) or uuid.uuid4().hex
+    st.session_state.session_link = sign(st.session_state.session_id, link_secret())
+if st.query_params.get("sid") != st.session_state.session_link:
+    st.query_params["sid"] = st.session_state.session_link
+current_session.set(st.session_state.session_id)
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+# Analyses run on a process-wide worker pool; jobs a previous process left
+# unfinished are resumed when the first session starts it
+@st.cache_resource
+def get_job_runner():
+    history = get_history_store()
+    def record_history(job):
+        if job["status"] == "done":
+            history.add(job["session"], job["jd"], job["sections"].get("analysis", ""))
+    runner = JobRunner(workers=int(st.secrets.get("JOB_WORKERS", DEFAULT_JOB_WORKERS)), on_done=record_history)
+    runner.resume_unfinished()
+    return runner
+
+# Section texts and rendered downloads of every session; large or idle ones live on disk
+@st.cache_resource
+def get_session_memory():
+    return SessionMemory()
+
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher()
+
+@st.cache_resource
+def get_ranker():
+    return Ranker()
+
+@st.cache_resource
+def get_exporter():
+    return Exporter()
+
+# Heavy libraries load on first use, so the first paint only pays for Streamlit
+@st.cache_resource
+def load_image(path):
+    # decoded once per process instead of on every rerun of the tab
+    from PIL import Image
+    img = Image.open(path)
+    img.load()
+    return img
+
+def data_frame(data, columns=None):
+    import pandas as pd
+    return pd.DataFrame(data, columns=columns)
+
+# 2) Report artifacts — built only when a download is requested, kept per session by content
+def render_simple_pdf(text):
+    with stage("render:pdf_simple", chars=len(text)):
+        return generate_pdf_simple(text)
+
+def render_full_report(fmt, metrics, sections):
+    build = generate_structured_pdf if fmt == "pdf" else generate_structured_docx
+    with stage(f"render:full_{fmt}", chars=sum(map(len, sections))):
+        return build(list(metrics), *sections)
+
+def artifact_key(file_name, args):
+    return f"artifact:{file_name}:{hashlib.sha256(repr(args).encode()).hexdigest()[:16]}"
+
+def lazy_download(col, label, file_name, mime, render, *args):
+    # a requested artifact stays "prepared" across reruns until its inputs change;
+    # the bytes sit in the session's spill store, not in session_state
+    key = artifact_key(file_name, args)
+    if key in texts or col.button(f"Prepare {label}", key=f"prepare_{file_name}"):
+        if key not in texts:
+            texts.drop(f"artifact:{file_name}:")
+            texts[key] = render(*args)
+        col.download_button(label, data=texts[key], file_name=file_name, mime=mime)
+
+@st.cache_data(ttl=15, show_spinner=False)
+def cached_summary():
+    return summarize()
+
+# 3) Session state
+if "errors" not in st.session_state:
+    st.session_state.errors = {}
+if "scores" not in st.session_state:
+    st.session_state.scores = None
+if "last_run" not in st.session_state:
+    st.session_state.last_run = []
+if "pending" not in st.session_state:
+    st.session_state.pending = []
+# resume_text, jd_text, the sections and "artifact:..." downloads; missing keys read as ""
+texts = get_session_memory().for_session(st.session_state.session_id)
+if "job_id" not in st.session_state:
+    # a fresh page only shows jobs it submits itself; whatever an earlier page left is dropped
+    st.session_state.job_id = None
+    st.session_state.watching_job = None
+    texts.drop("")
+    texts.job_id = None
+
+def sync_job():
+    """Copy a finished job into the session's texts once; returns the job's status."""
+    job_id = st.session_state.job_id
+    if not job_id or texts.job_id == job_id:
+        return None
+    store = get_job_runner().store
+    status, _ = store.status(job_id)
+    if status in ACTIVE:
+        return status
+    job = store.get(job_id)
+    texts.drop("artifact:")
+    texts.update({"resume_text": job["resume"], "jd_text": job["jd"]})
+    texts.update({key: job["sections"].get(key, "") for key in [*SECTION_LABELS, "recommendations"]})
+    errors = {k: v for k, v in job["errors"].items() if k in SECTION_LABELS}
+    if job["status"] == "failed":
+        errors["analysis"] = job["error"]
+    st.session_state.errors = errors
+    # sections the job gave up waiting for; regenerated one by one from the Analysis tab
+    st.session_state.pending = [k for k in SECTION_LABELS if k not in job["sections"] and k not in errors]
+    st.session_state.scores = job["scores"]
+    st.session_state.last_run = job["stages"]
+    texts.job_id = job_id
+    return status
+
+@st.fragment(run_every=1.0)
+def job_monitor(job_id):
+    runner = get_job_runner()
+    status, share = job_progress(runner.store, job_id)
+    if status not in ACTIVE:
+        st.rerun()
+    st.progress(share, text=f"Running ATS analysis and tailoring... {share:.0%}")
+    # sections still streaming in the worker
+    for key, text in runner.live_text(job_id).items():
+        with st.expander(SECTION_LABELS[key], expanded=True):
+            st.markdown(text)
+    st.caption("This runs in the background: switching tabs won't interrupt it, and after a reload the result is in History.")
+
+@st.fragment(run_every=0.5)
+def export_monitor(export):
+    if export.done():
+        st.rerun()
+    finished, total = export.progress()
+    st.progress(finished / total, text=f"Rendering all downloads... {finished}/{total}")
+
+@st.fragment(run_every=1.0)
+def ranking_board(ranking):
+    # rows fill in as each resume finishes; polling stops with the ranking
+    if ranking.done():
+        # one full rerun: the finished board is drawn outside the fragment and
+        # the "Tailor for" choices include every resume
+        st.rerun()
+    ranking_table(ranking)
+
+def ranking_table(ranking):
+    # st.dataframe columns sort on click
+    st.dataframe(data_frame(ranking.rows(), columns=RANK_COLUMNS), hide_index=True)
+
+job_active = sync_job() in ACTIVE
+
+# 4) Styling & navbar
 st.markdown("""
 <style>
 footer, header {visibility:hidden;}
@@ -238,110 +231,159 @@ with st.sidebar:
         [("Gemma 3.27B","gemma-3-27b-it")],
         format_func=lambda x: x[0]
     )[1]
+    max_concurrency = st.slider("Parallel LLM calls", 1, 8, DEFAULT_MAX_CONCURRENCY)
+    stream_output = st.toggle("Stream responses", value=True)
+    structured_mode = st.toggle(
+        "Single-call structured mode", value=False,
+        help="Ask for every section in one JSON response instead of eight prompts."
+    )
+    prefetch_jd = st.toggle(
+        "Prefetch JD insights", value=True,
+        help="Start the JD-only sections (cover letter, interview questions, ...) as soon as a JD is pasted."
+    )
+    with st.expander("Response cache"):
+        cache_stats = get_cache().stats()
+        st.write(f"Hits: {cache_stats['hits']} · Misses: {cache_stats['misses']}")
+        st.write(f"Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.0f} KB)")
+        if st.button("Clear cache"):
+            get_cache().clear()
+    with st.expander("Performance"):
+        if st.session_state.last_run:
+            st.caption("Last analysis")
+            st.dataframe(data_frame([
+                {"Stage": r["stage"], "Seconds": r["seconds"], "Cache": "hit" if r.get("cache_hit") else "",
+                 "Tokens in": r.get("tokens_in"), "Tokens out": r.get("tokens_out")}
+                for r in st.session_state.last_run
+            ]), hide_index=True)
+        stage_summary = cached_summary()
+        if stage_summary:
+            st.caption("All sessions (recent)")
+            st.dataframe(data_frame([
+                {"Stage": name, "Count": s["count"], "p50 s": round(s["p50"], 3), "p95 s": round(s["p95"], 3)}
+                for name, s in stage_summary.items()
+            ]), hide_index=True)
+    # every session in the process is listed, so only whoever holds the ADMIN_TOKEN secret sees it
+    admin_token = st.secrets.get("ADMIN_TOKEN", "")
+    if admin_token:
+        with st.expander("Admin"):
+            entered = st.text_input("Admin token", type="password")
+            if entered and hmac.compare_digest(entered, admin_token):
+                usage = get_session_memory().usage(tasks=[get_ranker(), get_prefetcher(), get_exporter()])
+                st.write(f"Sessions: {len(usage)} · In memory: {sum(r['memory_bytes'] for r in usage) / 1024:.0f} KB"
+                         f" · On disk: {sum(r['disk_bytes'] for r in usage) / 1024:.0f} KB")
+                st.dataframe(data_frame([
+                    {"Session": r["session"][:8] + (" (you)" if r["session"] == st.session_state.session_id else ""),
+                     "Memory KB": round(r["memory_bytes"] / 1024, 1), "Tasks KB": round(r["task_bytes"] / 1024, 1),
+                     "Disk KB": round(r["disk_bytes"] / 1024, 1), "Spilled KB": round(r["spilled_bytes"] / 1024, 1),
+                     "Items": r["keys"], "Idle s": None if r["idle_seconds"] is None else round(r["idle_seconds"])}
+                    for r in usage
+                ]), hide_index=True)
     st.markdown("---")
     with st.expander("GitHub"):
         st.write("[Follow on GitHub](https://github.com/ubparmar)")
 
-# 9) Home tab
+# 5) Home tab
 if choice == tabs[0]:
     st.title("PathPinpoint ATS Optimizer")
     jd = st.text_area("Paste Job Description", height=180)
-    uploaded = st.file_uploader("Upload Resume (PDF)", type="pdf")
+    rank_mode = st.toggle("Compare several resumes", value=False,
+                          help="Score many resume versions against this JD, then tailor the one you pick.")
+    if rank_mode:
+        uploads = st.file_uploader("Upload Resumes (PDF)", type="pdf", accept_multiple_files=True)
+    else:
+        uploaded = st.file_uploader("Upload Resume (PDF)", type="pdf")
+    # JD-only prompts start while the resume is still being picked
+    if prefetch_jd and not structured_mode:
+        prefetch = get_prefetcher().start(st.session_state.session_id, model_choice, jd)
+        if prefetch is not None:
+            finished, total = prefetch.progress()
+            st.caption(f"Preparing JD insights in the background: {finished}/{total}")
+    else:
+        get_prefetcher().cancel(st.session_state.session_id)
     with st.expander("Usage Tips"):
         st.markdown("- Provide full JD  \n- Upload clear PDF  \n- Click Analyze & Tailor then switch to Analysis")
-    if st.button("Analyze & Tailor"):
+
+    def submit_job(rt, jd):
+        mode = "structured" if structured_mode else "stream" if stream_output else "parallel"
+        st.session_state.job_id = get_job_runner().submit(
+            st.session_state.session_id, rt, jd, model_choice, mode=mode, max_concurrency=max_concurrency,
+        )
+
+    if rank_mode:
+        if st.button("Rank resumes"):
+            if not jd or not uploads:
+                st.error("Please supply a JD and at least one PDF.")
+            else:
+                get_ranker().start(st.session_state.session_id, model_choice, jd,
+                                   [(u.name, u.getvalue()) for u in uploads])
+        ranking = get_ranker().get(st.session_state.session_id)
+        if ranking is not None:
+            if ranking.done():
+                ranking_table(ranking)
+            else:
+                ranking_board(ranking)
+            ready = [r["Resume"] for r in ranking.rows() if ranking.resume_text(r["Resume"])]
+            if ready:
+                pick = st.selectbox("Tailor for", ready)
+                if st.button("Run full tailoring"):
+                    submit_job(ranking.resume_text(pick), ranking.jd)
+                    job_active = True
+    elif st.button("Analyze & Tailor"):
         if not jd or not uploaded:
             st.error("Please supply both JD and a PDF.")
         else:
-            with st.spinner("Extracting text..."):
-                reader = pdf.PdfReader(uploaded)
-                rt = "\n".join(p.extract_text() or "" for p in reader.pages)
-            st.session_state.resume_text = rt
-            st.session_state.jd_text = jd
-
-            ats_prompt = f"""
-You are an ATS. Respond in bullets:
-- Job Description Match With Ats score:
-- Missing Keywords:
-- Profile Summary:
-- Personalized suggestions for skills, keywords and achievements that can enhance the provided resume:
-- Application Success Rate:
-- Skill Gap Percentage:
-- Suggest 3 related job titles based on the following:
-Resume:
-{rt}
-JD:
-{jd}
-"""
-            with st.spinner("Running ATS analysis..."):
-                resp = genai.GenerativeModel(model_choice).generate_content(ats_prompt)
-            st.session_state.analysis = resp.text.strip()
-            st.session_state.recommendations = extract_section(st.session_state.analysis, "personalized suggestions")
-
-            tailor_prompt = f"""
-You are a professional resume writer with 10+ years experience. Using the ORIGINAL resume and JD, write a fully tailored resume:
-ORIGINAL:
-{rt}
-JD:
-{jd}
-Output only the resume.
-"""
-            with st.spinner("Generating tailored resume..."):
-                tr = genai.GenerativeModel(model_choice).generate_content(tailor_prompt).text.strip()
-            st.session_state.tailored = tr
-
-            with st.spinner("Generating additional insights..."):
-                st.session_state.cover_letter = genai.GenerativeModel(model_choice).generate_content(
-                    f"Write a one-page cover letter for JD:\n{jd}"
-                ).text.strip()
-                st.session_state.interview_qs = genai.GenerativeModel(model_choice).generate_content(
-                    f"List 5 likely interview questions for JD:\n{jd}"
-                ).text.strip()
-                st.session_state.skill_gap = genai.GenerativeModel(model_choice).generate_content(
-                    f"Compare skills to JD requirements; give Skill Gap Percentage with bullet points and calculate skill gap and no results in table maybe bulletpoints:\n{jd}"
-                ).text.strip()
-                st.session_state.related_roles = genai.GenerativeModel(model_choice).generate_content(
-                    "Suggest 3 related job titles. By the JD and Resume you generated:\n{jd}{rt}"
-                ).text.strip()
-                st.session_state.salary_estimate = genai.GenerativeModel(model_choice).generate_content(
-                    f"Estimate salary range in USD for JD:\n{jd}"
-                ).text.strip()
-                st.session_state.networking_tips = genai.GenerativeModel(model_choice).generate_content(
-                    f"Provide 3 networking tips for this JD:\n{jd}"
-                ).text.strip()
-
-            st.session_state.history.append((datetime.now(), jd, st.session_state.analysis))
-            st.success("Analysis complete! Go to Analysis tab.")
-
-# 10) Analysis tab
+            try:
+                with st.spinner("Extracting text..."), stage("extraction", bytes=uploaded.size):
+                    rt = extract_text(uploaded.getvalue())
+            except ExtractionError as exc:
+                st.error(str(exc))
+                st.stop()
+            submit_job(rt, jd)
+            job_active = True
+    if job_active:
+        st.session_state.watching_job = st.session_state.job_id
+        job_monitor(st.session_state.job_id)
+    elif st.session_state.watching_job and st.session_state.watching_job == texts.job_id:
+        # the job this page was waiting on just finished
+        st.session_state.watching_job = None
+        for key, err in st.session_state.errors.items():
+            st.warning(f"{SECTION_LABELS[key]} failed: {err}")
+        if st.session_state.pending:
+            st.info(f"{len(st.session_state.pending)} sections ran out of time; regenerate them from the Analysis tab.")
+        st.success("Analysis complete! Go to Analysis tab.")
+
+# 6) Analysis tab
 elif choice == tabs[1]:
-    if not st.session_state.analysis:
-        st.info("Run an analysis first.")
-    else:
-        def get_val(key):
-            for ln in st.session_state.analysis.splitlines():
-                t = ln.lstrip("- ").strip()
-                if t.lower().startswith(key.lower()):
-                    num = "".join(ch for ch in t.split(":",1)[1] if ch.isdigit() or ch==".")
-                    try: return float(num)
-                    except: pass
-            return None
-
-        m = get_val("Job Description Match")
-        s = get_val("Application Success Rate")
-        g = get_val("Skill Gap Percentage")
-        sim = SequenceMatcher(None, st.session_state.resume_text, st.session_state.jd_text).ratio() * 100
-
-        metrics = []
-        if m is not None: metrics.append(("Job Match %", f"{m:.1f}%"))
-        if s is not None: metrics.append(("Success Rate %", f"{s:.1f}%"))
-        if g is not None: metrics.append(("Skill Gap %", f"{g:.1f}%"))
-        metrics.append(("Text Similarity %", f"{sim:.1f}%"))
+    # while single sections are regenerated, the rest of the last result stays on screen
+    regenerating = job_active and st.session_state.get("regenerating") == st.session_state.job_id
+    if job_active:
+        job_monitor(st.session_state.job_id)
+    if not texts.get("analysis"):
+        if not job_active:
+            st.info("Run an analysis first.")
+    elif regenerating or not job_active:
+        for key, err in st.session_state.errors.items():
+            st.warning(f"{SECTION_LABELS[key]} failed: {err}")
+        for key in st.session_state.pending:
+            st.info(f"{SECTION_LABELS[key]} is pending: it didn't finish within the time budget.")
+        retry = [*st.session_state.errors, *st.session_state.pending]
+        if retry and not job_active:
+            for col, key in zip(st.columns(len(retry)), retry):
+                if col.button(f"Regenerate {SECTION_LABELS[key].lower()}", key=f"regenerate_{key}"):
+                    get_job_runner().regenerate(st.session_state.job_id, [key])
+                    st.session_state.regenerating = st.session_state.job_id
+                    texts.job_id = None  # reload the job once the section is back
+                    st.rerun()
+        # read once per run: spilled sections come back from disk
+        sections = {key: texts.get(key) for key in [*SECTION_LABELS, "recommendations", "resume_text", "jd_text"]}
+        metrics = compute_metrics(
+            sections["analysis"], sections["resume_text"], sections["jd_text"], scores=st.session_state.scores,
+        )
 
         st.subheader("📊 ATS & Similarity Scores")
-        st.table(pd.DataFrame(metrics, columns=["Metric","Value"]))
+        st.table(data_frame(metrics, columns=["Metric","Value"]))
 
-        recs = st.session_state.recommendations or st.session_state.analysis
+        recs = sections["recommendations"] or sections["analysis"]
         st.subheader("📝 Recommendations")
         st.text_area("Recommendations", recs, height=200)
 
@@ -349,88 +391,90 @@ elif choice == tabs[1]:
         st.subheader("📥 Download Outputs")
         col_res, col_cover, col_tail, col_full = st.columns(4)
 
-        # Original Resume (PDF)
-        col_res.download_button(
-            "Resume (PDF)",
-            data=generate_pdf_simple(st.session_state.resume_text),
-            file_name="resume.pdf",
-            mime="application/pdf"
-        )
-
-        # Cover Letter (PDF)
-        col_cover.download_button(
-            "Cover Letter (PDF)",
-            data=generate_pdf_simple(st.session_state.cover_letter),
-            file_name="cover_letter.pdf",
-            mime="application/pdf"
-        )
-
-        # Tailored Resume (PDF)
-        col_tail.download_button(
-            "Tailored Resume (PDF)",
-            data=generate_pdf_simple(st.session_state.tailored),
-            file_name="tailored_resume.pdf",
-            mime="application/pdf"
-        )
-
-        # Full Report (PDF & DOCX)
-        full_pdf = generate_structured_pdf(
-            metrics, recs,
-            st.session_state.tailored,
-            st.session_state.cover_letter,
-            st.session_state.interview_qs,
-            st.session_state.skill_gap,
-            st.session_state.related_roles,
-            st.session_state.salary_estimate,
-            st.session_state.networking_tips
-        )
-        full_docx = generate_structured_docx(
-            metrics, recs,
-            st.session_state.tailored,
-            st.session_state.cover_letter,
-            st.session_state.interview_qs,
-            st.session_state.skill_gap,
-            st.session_state.related_roles,
-            st.session_state.salary_estimate,
-            st.session_state.networking_tips
-        )
-        col_full.download_button(
-            "Full Report (PDF)",
-            data=full_pdf,
-            file_name="full_report.pdf",
-            mime="application/pdf"
-        )
-        col_full.download_button(
-            "Full Report (DOCX)",
-            data=full_docx,
-            file_name="full_report.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        full_sections = report_sections(dict(sections, recommendations=recs))
+        PDF_MIME = "application/pdf"
+        DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        BUNDLE_NAME = "pathpinpoint_downloads.zip"
+
+        downloads = [
+            (col_res, "Resume (PDF)", "resume.pdf", PDF_MIME, render_simple_pdf, (sections["resume_text"],)),
+            (col_cover, "Cover Letter (PDF)", "cover_letter.pdf", PDF_MIME,
+             render_simple_pdf, (sections["cover_letter"],)),
+            (col_tail, "Tailored Resume (PDF)", "tailored_resume.pdf", PDF_MIME,
+             render_simple_pdf, (sections["tailored"],)),
+            (col_full, "Full Report (PDF)", "full_report.pdf", PDF_MIME,
+             render_full_report, ("pdf", tuple(metrics), full_sections)),
+            (col_full, "Full Report (DOCX)", "full_report.docx", DOCX_MIME,
+             render_full_report, ("docx", tuple(metrics), full_sections)),
+        ]
+        for col, label, file_name, mime, render, args in downloads:
+            lazy_download(col, label, file_name, mime, render, *args)
+
+        # every download in one ZIP, rendered in the background; its key covers all of their inputs
+        keys = {file_name: artifact_key(file_name, args) for _, _, file_name, _, _, args in downloads}
+        bundle_key = artifact_key(BUNDLE_NAME, tuple(keys.values()))
+        exporter = get_exporter()
+        export = exporter.get(st.session_state.session_id)
+        if export is not None and export.key != bundle_key:
+            export = None  # an export of earlier results
+        if export is not None and export.done() and export.error:
+            exporter.discard(st.session_state.session_id, export)
+            st.error(f"Couldn't build the ZIP: {export.error}")
+            export = None
+        if bundle_key in texts:
+            st.download_button("Download all (ZIP)", data=texts[bundle_key], file_name=BUNDLE_NAME,
+                               mime="application/zip")
+        elif export is not None and not export.done():
+            export_monitor(export)
+        elif st.button("Prepare all (ZIP)"):
+            files = []
+            # the full reports take longest, so they are queued first
+            for _, _, file_name, _, render, args in sorted(downloads, key=lambda d: d[4] is not render_full_report):
+                key = keys[file_name]
+                files.append((file_name, key, texts[key] if key in texts else partial(render, *args)))
+            manifest = {"job": st.session_state.job_id, "scores": dict(metrics)}
+            texts.drop(f"artifact:{BUNDLE_NAME}:")
+            # the worker saves the ZIP, and each file it renders, straight into the session's texts
+            exporter.start(st.session_state.session_id, texts, bundle_key, files, manifest)
+            st.rerun()
         # ────────────────────────────────────────────────────────────────────────
 
         st.subheader("✍️ AI-Tailored Resume")
-        st.text_area("Tailored Resume", st.session_state.tailored, height=300)
+        st.text_area("Tailored Resume", sections["tailored"], height=300)
 
         for title, content in [
-            ("Cover Letter", st.session_state.cover_letter),
-            ("Interview Prep Questions", st.session_state.interview_qs),
-            ("Skill Gap Analysis", st.session_state.skill_gap),
-            ("Related Roles", st.session_state.related_roles),
-            ("Salary Estimate", st.session_state.salary_estimate),
-            ("Networking Tips", st.session_state.networking_tips)
+            ("Cover Letter", sections["cover_letter"]),
+            ("Interview Prep Questions", sections["interview_qs"]),
+            ("Skill Gap Analysis", sections["skill_gap"]),
+            ("Related Roles", sections["related_roles"]),
+            ("Salary Estimate", sections["salary_estimate"]),
+            ("Networking Tips", sections["networking_tips"])
         ]:
             st.subheader(title)
-            st.text_area("", content, height=120)
+            st.text_area("", content, height=120, key=f"section_{title}")
 
-# 11) History tab
+# 7) History tab
 elif choice == tabs[2]:
     st.subheader("History")
-    if st.session_state.history:
-        df = pd.DataFrame([
-            {"Time": t.strftime("%Y-%m-%d %H:%M"), "JD Preview": jd[:30] + "..."}
-            for t, jd, _ in st.session_state.history
-        ]).tail(10)
-        st.table(df)
+    store = get_history_store()
+    total = store.count(st.session_state.session_id)
+    if total:
+        PAGE_SIZE = 10
+        pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        rows = store.page(st.session_state.session_id, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+        st.table(data_frame([
+            {"Time": datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M"), "JD Preview": preview + "..."}
+            for _, t, preview in rows
+        ]))
+        labels = {f"#{entry_id} · {datetime.fromtimestamp(t):%Y-%m-%d %H:%M} · {preview}": entry_id
+                  for entry_id, t, preview in rows}
+        opened = st.selectbox("Open analysis", ["—", *labels])
+        if opened in labels:
+            # full texts are only read for the entry being viewed
+            jd_text, analysis_text = store.get(st.session_state.session_id, labels[opened])
+            st.text_area("Job Description", jd_text, height=150)
+            st.text_area("Analysis", analysis_text, height=300)
     else:
         st.info("No history yet.")
 elif choice == tabs[3]:
@@ -518,7 +562,7 @@ elif choice == tabs[3]:
         st.markdown(grid_html, unsafe_allow_html=True)
 
     with col2:
-        img = Image.open("images/ub.jpg")
+        img = load_image("images/ub.jpg")
         st.image(img, width=300, caption="Urjeet Parmar")
 
     # 4) Experience
@@ -600,7 +644,6 @@ elif choice == "📋 About Project":
         """, unsafe_allow_html=True)
 
     with col2:
-        from PIL import Image
-        logo = Image.open("images/pathpinpoint_logo.png")
+        logo = load_image("images/pathpinpoint_logo.png")
         st.image(logo, use_column_width=True, caption="PathPinpoint ATS Optimizer")
 
@@ -0,0 +1,186 @@
+"""Headless batch scoring: every resume PDF against every JD text file.
+
+    python batch.py resumes/ jds/ -o results.jsonl --sections analysis
+
+One JSON record per (resume, JD) pair is appended to the output file as
+soon as that pair finishes. The output file doubles as the checkpoint:
+rerunning the same command skips pairs that already have a successful
+record, so a crashed run picks up where it stopped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+
+from extraction import ExtractionError, configure_workers, extract_text
+from keywords import keyword_report
+from llm import set_api_key
+from pipeline import SECTION_LABELS, compute_metrics, report_sections, run_analysis
+from reports import generate_structured_pdf
+
+DEFAULT_MODEL = "gemma-3-27b-it"
+
+
+def _read_resume(path):
+    # one extraction worker per resume; several resumes are read at once
+    try:
+        with open(path, "rb") as fh:
+            return extract_text(fh.read(), parallel=False), None
+    except (OSError, ExtractionError) as exc:
+        return None, str(exc)
+
+
+def _render_report(path, metrics, sections):
+    with open(path, "wb") as fh:
+        fh.write(generate_structured_pdf(metrics, *sections))
+    return path
+
+
+def load_checkpoint(out_path, keys=()):
+    """(resume, jd) pairs already scored in `out_path`.
+
+    A record doesn't count if the pair failed, or if any of the sections in
+    `keys` failed, so rerunning with the same sections retries it.
+    """
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash
+            failed = set(rec.get("errors") or ()) & set(keys)
+            if not rec.get("error") and not failed:
+                done.add((rec["resume"], rec["jd"]))
+    return done
+
+
+def score_pair(model_name, resume_name, rt, jd_name, jd, keys, include_text):
+    """Score one pair; returns its record and the arguments for its PDF report."""
+    started = time.monotonic()
+    sections, errors = run_analysis(model_name, rt, jd, keys=keys, max_concurrency=1)
+    metrics = compute_metrics(sections["analysis"], rt, jd)
+    record = {
+        "resume": resume_name,
+        "jd": jd_name,
+        "metrics": dict(metrics),
+        "missing_keywords": keyword_report(rt, jd)["missing"],
+        "errors": errors,
+    }
+    if include_text:
+        record["sections"] = {k: sections[k] for k in keys or ["analysis"]}
+    record["seconds"] = round(time.monotonic() - started, 3)
+    return record, (metrics, report_sections(sections))
+
+
+def parse_sections(value):
+    if value == "all":
+        return list(SECTION_LABELS)
+    if value == "none":
+        return []
+    keys = [k.strip() for k in value.split(",") if k.strip()]
+    unknown = set(keys) - set(SECTION_LABELS)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown sections {sorted(unknown)}; choose from {list(SECTION_LABELS)}"
+        )
+    return keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score resume PDFs against job descriptions.")
+    parser.add_argument("resumes", help="directory of resume PDFs")
+    parser.add_argument("jds", help="directory of job description .txt files")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL output / checkpoint file")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--sections", type=parse_sections, default=["analysis"],
+                        help="comma-separated LLM sections, 'all', or 'none' for local scoring only")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="worker processes for PDF extraction and report rendering")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="max in-flight LLM requests")
+    parser.add_argument("--reports", metavar="DIR", help="also write a full PDF report per pair")
+    parser.add_argument("--include-text", action="store_true", help="store generated section text")
+    args = parser.parse_args(argv)
+
+    if args.sections:
+        load_dotenv()
+        api_key = os.getenv("GOOGLE_API_KEY", "")
+        if not api_key:
+            parser.error("GOOGLE_API_KEY is not set (use --sections none for offline scoring)")
+        set_api_key(api_key)
+    if args.reports:
+        os.makedirs(args.reports, exist_ok=True)
+
+    resumes = sorted(f for f in os.listdir(args.resumes) if f.lower().endswith(".pdf"))
+    jds = {}
+    for name in sorted(os.listdir(args.jds)):
+        if name.lower().endswith(".txt"):
+            with open(os.path.join(args.jds, name), encoding="utf-8") as fh:
+                jds[name] = fh.read()
+    done = load_checkpoint(args.output, args.sections)
+    todo = [(r, j) for r in resumes for j in jds if (r, j) not in done]
+    print(f"{len(resumes)} resumes x {len(jds)} JDs, {len(todo)} pairs to score "
+          f"({len(done)} already in {args.output})", file=sys.stderr)
+    if not todo:
+        return 0
+
+    # spawn: the LLM and reader threads are already running when the first report is rendered
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool, \
+            ThreadPoolExecutor(max_workers=max(1, args.llm_concurrency)) as llm_pool, \
+            open(args.output, "a", encoding="utf-8") as out:
+        needed = sorted({r for r, _ in todo})
+        configure_workers(args.workers)
+        with ThreadPoolExecutor(max_workers=args.workers) as readers:
+            texts = dict(zip(needed, readers.map(_read_resume, [os.path.join(args.resumes, r) for r in needed])))
+
+        futures = {}
+        for resume_name, jd_name in todo:
+            rt, err = texts[resume_name]
+            if err:
+                out.write(json.dumps({"resume": resume_name, "jd": jd_name, "error": err}) + "\n")
+                continue
+            fut = llm_pool.submit(score_pair, args.model, resume_name, rt, jd_name, jds[jd_name],
+                                  args.sections, args.include_text)
+            futures[fut] = (resume_name, jd_name)
+        out.flush()
+
+        # scored pairs go to the render pool from here, so a report never holds an LLM thread
+        total, written = len(futures), 0
+        renders = {}
+        while futures or renders:
+            finished, _ = wait([*futures, *renders], return_when=FIRST_COMPLETED)
+            for fut in finished:
+                if fut in renders:
+                    record = renders.pop(fut)
+                    try:
+                        record["report"] = fut.result()
+                    except Exception as exc:
+                        record["error"] = f"report: {type(exc).__name__}: {exc}"  # retried on the next run
+                else:
+                    resume_name, jd_name = futures.pop(fut)
+                    try:
+                        record, report_args = fut.result()
+                    except Exception as exc:
+                        record = {"resume": resume_name, "jd": jd_name, "error": f"{type(exc).__name__}: {exc}"}
+                    else:
+                        if args.reports:
+                            stem = f"{os.path.splitext(resume_name)[0]}__{os.path.splitext(jd_name)[0]}.pdf"
+                            renders[pool.submit(_render_report, os.path.join(args.reports, stem),
+                                                *report_args)] = record
+                            continue
+                written += 1
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                print(f"[{written}/{total}] {record['resume']} x {record['jd']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
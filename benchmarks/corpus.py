@@ -0,0 +1,87 @@
+"""Deterministic synthetic resumes, JDs and LLM-style Markdown outputs."""
+import random
+
+WORDS_PER_PAGE = 500
+SIZES = {"1p": 1, "5p": 5, "20p": 20}
+
+_SKILLS = [
+    "Python", "Kubernetes", "Docker", "AWS", "Terraform", "PostgreSQL", "Redis", "React",
+    "TypeScript", "CI/CD", "Kafka", "Spark", "Airflow", "machine learning", "GraphQL",
+]
+_VERBS = ["Built", "Led", "Designed", "Migrated", "Optimized", "Automated", "Shipped", "Scaled"]
+_FILLER = (
+    "team services platform customers latency throughput reliability pipeline data "
+    "product stakeholders roadmap release quality cost revenue users infrastructure"
+).split()
+# characters to_latin1 has to rewrite or drop
+_UNICODE = ["•", "–", "—", "‘", "’", "“", "”", "…", "✓", "é"]
+
+
+def _sentence(rng, words):
+    body = " ".join(rng.choice(_FILLER + _SKILLS) for _ in range(words))
+    return f"{rng.choice(_VERBS)} {body} {rng.choice(_UNICODE)} by {rng.randint(5, 60)}%."
+
+
+def resume_text(pages, seed=0):
+    # plain extracted-PDF style text: headings, bullet lines, repeated page footers
+    rng = random.Random(seed)
+    lines, words = ["Jane Doe", "Senior Software Engineer", "jane@example.com"], 0
+    while words < pages * WORDS_PER_PAGE:
+        lines.append(rng.choice(["EXPERIENCE", "PROJECTS", "SKILLS", "EDUCATION"]))
+        for _ in range(rng.randint(3, 6)):
+            sentence = _sentence(rng, rng.randint(8, 18))
+            lines.append(f"• {sentence}")
+            words += len(sentence.split())
+        if len(lines) % 40 < 6:
+            lines.append("Jane Doe — Resume — Page")
+    return "\n".join(lines)
+
+
+def jd_text(pages, seed=1):
+    rng = random.Random(seed)
+    parts = ["Senior Backend Engineer", "Responsibilities:"]
+    words = 0
+    while words < pages * WORDS_PER_PAGE:
+        sentence = _sentence(rng, rng.randint(10, 20))
+        parts.append(f"- {sentence}")
+        words += len(sentence.split())
+    parts.append("Requirements: " + ", ".join(rng.sample(_SKILLS, 8)))
+    return "\n".join(parts)
+
+
+def llm_markdown(pages, seed=2):
+    # the Markdown Gemini returns: headings, bold, bullets, numbered lists, smart quotes
+    rng = random.Random(seed)
+    out, words = [], 0
+    while words < pages * WORDS_PER_PAGE:
+        out.append(f"## {rng.choice(['Summary', 'Experience', 'Skills', 'Highlights'])}")
+        for i in range(rng.randint(3, 6)):
+            sentence = _sentence(rng, rng.randint(8, 16))
+            marker = rng.choice(["- ", "* ", "+ ", f"{i + 1}. "])
+            out.append(f"{marker}**{rng.choice(_SKILLS)}:** “{sentence}”")
+            words += len(sentence.split()) + 1
+        out.append("")
+    return "\n".join(out)
+
+
+def ats_analysis(pages, seed=3):
+    rng = random.Random(seed)
+    head = [
+        f"- Job Description Match With Ats score: {rng.randint(40, 95)}%",
+        "- Missing Keywords: " + ", ".join(rng.sample(_SKILLS, 5)),
+        "- Profile Summary: " + _sentence(rng, 30),
+        "- Personalized suggestions for skills, keywords and achievements that can enhance the provided resume:",
+    ]
+    return "\n".join(head + [llm_markdown(pages, seed)] + [
+        f"- Application Success Rate: {rng.randint(20, 90)}%",
+        f"- Skill Gap Percentage: {rng.randint(5, 60)}%",
+    ])
+
+
+def report_inputs(pages):
+    # positional arguments of generate_structured_pdf/docx; the tailored resume
+    # scales with `pages`, the other sections stay at their usual ~1 page
+    metrics = [("Job Match %", "72.0%"), ("Skill Gap %", "30.0%"), ("Text Similarity %", "41.3%")]
+    sections = [llm_markdown(1, seed=10 + i) for i in range(8)]
+    sections[1] = llm_markdown(pages, seed=20)
+    return metrics, tuple(sections)
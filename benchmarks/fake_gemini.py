@@ -0,0 +1,91 @@
+"""In-process stand-in for `google.generativeai.GenerativeModel`.
+
+`install()` swaps the SDK's model class for `FakeModel`, which answers
+after a configurable latency, fails with a configurable probability and
+can stall on a share of calls, without any network access. Responses follow the layout the section
+prompts ask for, so scores parse and reports render as with the real model.
+"""
+import random
+import threading
+import time
+import types
+
+import llm
+
+ATS_RESPONSE = """- Job Description Match With Ats score: {score}%
+- Missing Keywords: Kubernetes, Terraform
+- Profile Summary: Backend engineer with Python and AWS experience.
+- Personalized suggestions for skills, keywords and achievements that can enhance the provided resume:
+- Add Kubernetes deployments you have run
+- Quantify the impact of the data pipeline work
+- Application Success Rate: {success}%
+- Skill Gap Percentage: {gap}%
+"""
+SECTION_RESPONSE = """# {title}
+- First point with **bold** text for prompt {n}
+- Second point
+Plain closing paragraph for the section.
+"""
+STREAM_CHUNK_CHARS = 40
+
+
+class FakeModel:
+    latency = 0.5
+    jitter = 0.25
+    error_rate = 0.0
+    stall_rate = 0.0
+    stall_seconds = 30.0
+    calls = 0
+    failures = 0
+    _lock = threading.Lock()
+    _random = random.Random(0)
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    @classmethod
+    def _sample(cls):
+        with cls._lock:
+            cls.calls += 1
+            delay = max(0.0, cls._random.gauss(cls.latency, cls.jitter * cls.latency))
+            if cls._random.random() < cls.stall_rate:
+                delay = cls.stall_seconds
+            fail = cls._random.random() < cls.error_rate
+            if fail:
+                cls.failures += 1
+        return delay, fail
+
+    def _text(self, prompt):
+        n = sum(map(ord, prompt[:200])) % 1000
+        if prompt.lstrip().startswith("You are an ATS"):
+            return ATS_RESPONSE.format(score=55 + n % 40, success=40 + n % 50, gap=5 + n % 40)
+        return SECTION_RESPONSE.format(title=prompt.strip().split("\n", 1)[0][:40], n=n)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        from google.api_core import exceptions
+
+        delay, fail = self._sample()
+        time.sleep(delay)
+        if fail:
+            raise exceptions.ServiceUnavailable("fake Gemini: injected failure")
+        text = self._text(prompt)
+        usage = types.SimpleNamespace(prompt_token_count=llm.estimate_tokens(prompt),
+                                      candidates_token_count=llm.estimate_tokens(text))
+        if not stream:
+            return types.SimpleNamespace(text=text, usage_metadata=usage)
+        return [types.SimpleNamespace(text=text[i:i + STREAM_CHUNK_CHARS])
+                for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+
+
+def install(latency=0.5, jitter=0.25, error_rate=0.0, seed=0, stall_rate=0.0, stall_seconds=30.0):
+    """Route every model llm.py creates to FakeModel with these settings."""
+    import google.generativeai as genai
+
+    FakeModel.latency, FakeModel.jitter, FakeModel.error_rate = latency, jitter, error_rate
+    FakeModel.stall_rate, FakeModel.stall_seconds = stall_rate, stall_seconds
+    FakeModel._random = random.Random(seed)
+    FakeModel.calls = FakeModel.failures = 0
+    genai.GenerativeModel = FakeModel
+    with llm._models_lock:
+        llm._models.clear()
+    return FakeModel
@@ -0,0 +1,229 @@
+"""Concurrent-session load test of the Home -> Analysis flow.
+
+    python -m benchmarks.load                                # 1, 2, 4, 8 sessions at once
+    python -m benchmarks.load --concurrency 4,16,32 --rounds 3
+    python -m benchmarks.load --latency 1.5 --error-rate 0.05 --json load.json
+    python -m benchmarks.load --stall-rate 0.02 --stall-seconds 60     # tail latency with stuck calls
+
+Each simulated session is its own Streamlit `AppTest` running app.py in
+this process, the way one server process hosts many browser sessions. A
+session opens Home, pastes a JD, uploads a resume PDF, clicks "Analyze &
+Tailor", waits for the job to finish and opens the Analysis tab; the time
+for all of that is its end-to-end latency. `google.generativeai` is
+replaced by benchmarks/fake_gemini.py, so the run is offline and its
+latency and failure rate are set on the command line.
+
+At every concurrency level `concurrency * rounds` sessions run on
+`concurrency` threads. Every session sends its own resume and JD, so the
+response cache doesn't turn the load into cache hits unless
+--shared-inputs is given. AppTest swaps process-wide state (the runtime,
+st.secrets) for each script run, so script runs take turns; everything the
+runs start (jobs, PDF extraction, model calls) overlaps as on a server.
+"script s" is a session's median time spent in script runs. Caches, job
+and history stores and metrics go to a temporary directory, never to the
+project's .cache/.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+SESSION_TIMEOUT = 300
+POLL_INTERVAL = 0.1
+
+_script_lock = threading.Lock()
+_script_time = threading.local()
+
+
+class _Upload(io.BytesIO):
+    # what st.file_uploader hands the script
+    type = "application/pdf"
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = self.file_id = name
+
+    @property
+    def size(self):
+        return len(self.getvalue())
+
+
+def _patch_uploader(resumes):
+    # AppTest can't drive a file uploader, so the uploader returns the PDF the
+    # session put in its state under "load_resume"
+    import streamlit as st
+
+    def file_uploader(*args, **kwargs):
+        index = st.session_state.get("load_resume")
+        if index is None:
+            return [] if kwargs.get("accept_multiple_files") else None
+        upload = _Upload(f"resume-{index}.pdf", resumes[index % len(resumes)])
+        return [upload] if kwargs.get("accept_multiple_files") else upload
+    st.file_uploader = file_uploader
+
+
+def _serialize_script_runs():
+    from streamlit.testing.v1 import AppTest
+
+    run = AppTest._run
+
+    def locked_run(self, *args, **kwargs):
+        with _script_lock:
+            started = time.perf_counter()
+            try:
+                return run(self, *args, **kwargs)
+            finally:
+                _script_time.seconds += time.perf_counter() - started
+    AppTest._run = locked_run
+
+
+def _rss_mb():
+    # current resident set size; Linux only, None elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return None
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def run_session(index, jd, secrets):
+    """One session through Home -> Analysis; returns (seconds, script seconds, outcome)."""
+    from streamlit.testing.v1 import AppTest
+
+    _script_time.seconds = 0.0
+    started = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=SESSION_TIMEOUT)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    at.run()
+    at.session_state["load_resume"] = index
+    at.text_area[0].input(jd)
+    next(b for b in at.button if b.label == "Analyze & Tailor").click()
+    at.run()
+    deadline = started + SESSION_TIMEOUT
+    while not at.success and not at.exception and time.perf_counter() < deadline:
+        time.sleep(POLL_INTERVAL)
+        at.run()
+    finished = bool(at.success)
+    if finished and not at.exception:
+        at.radio[0].set_value("📊 Analysis")
+        at.run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        return elapsed, _script_time.seconds, "exception: " + at.exception[0].value.splitlines()[0]
+    if not finished:
+        return elapsed, _script_time.seconds, "timeout"
+    # sections the fake failed show up as warnings; the session still completed
+    return elapsed, _script_time.seconds, "degraded" if at.warning else "ok"
+
+
+def run_level(concurrency, rounds, jds, secrets, offset):
+    from instrumentation import _quantile
+    from benchmarks.fake_gemini import FakeModel
+
+    calls, failures = FakeModel.calls, FakeModel.failures
+    sessions = concurrency * rounds
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as pool:
+        results = list(pool.map(
+            lambda i: run_session(offset + i, jds[(offset + i) % len(jds)], secrets), range(sessions)))
+    wall = time.perf_counter() - started
+    latencies = sorted(seconds for seconds, _, outcome in results if outcome in ("ok", "degraded"))
+    outcomes = {}
+    for _, _, outcome in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "completed": len(latencies),
+        "outcomes": outcomes,
+        "wall_s": wall,
+        "throughput_per_min": len(latencies) / wall * 60,
+        "p50_s": _quantile(latencies, 0.50),
+        "p95_s": _quantile(latencies, 0.95),
+        "p99_s": _quantile(latencies, 0.99),
+        "script_s": _quantile(sorted(script for _, script, _ in results), 0.50),
+        "model_calls": FakeModel.calls - calls,
+        "injected_errors": FakeModel.failures - failures,
+        "rss_mb": _rss_mb(),
+        "peak_rss_mb": _peak_rss_mb(),
+        "threads": threading.active_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated concurrent session counts")
+    parser.add_argument("--rounds", type=int, default=2, help="sessions per concurrent slot at each level")
+    parser.add_argument("--latency", type=float, default=0.5, help="mean fake model latency per call, seconds")
+    parser.add_argument("--jitter", type=float, default=0.25, help="latency standard deviation, as a share of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake model calls that fail")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of fake model calls that hang")
+    parser.add_argument("--stall-seconds", type=float, default=30.0, help="how long a stalled call hangs")
+    parser.add_argument("--pages", type=int, default=2, help="resume length in pages")
+    parser.add_argument("--shared-inputs", action="store_true", help="every session sends the same resume and JD")
+    parser.add_argument("--rpm", type=int, default=100000, help="LLM_RPM secret for the run")
+    parser.add_argument("--tpm", type=int, default=100000000, help="LLM_TPM secret for the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+    levels = [int(n) for n in args.concurrency.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="pathpinpoint-load-")
+    json_path = os.path.abspath(args.json) if args.json else None
+    # the app's stores all live under a relative .cache/
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    from benchmarks import corpus, fake_gemini
+    from reports import generate_pdf_simple
+
+    # AppTest driven from plain threads warns about a missing ScriptRunContext on every call
+    logging.disable(logging.WARNING)
+
+    fake_gemini.install(args.latency, args.jitter, args.error_rate, args.seed, args.stall_rate, args.stall_seconds)
+    total = 1 if args.shared_inputs else sum(levels) * args.rounds
+    resumes = [generate_pdf_simple(corpus.resume_text(args.pages, seed=i)) for i in range(total)]
+    jds = [corpus.jd_text(1, seed=10_000 + i) for i in range(total)]
+    _patch_uploader(resumes)
+    _serialize_script_runs()
+    secrets = {"GOOGLE_API_KEY": "load-test", "LLM_RPM": args.rpm, "LLM_TPM": args.tpm}
+
+    print(f"fake model: latency {args.latency}s ±{args.jitter:.0%}, error rate {args.error_rate:.1%}, "
+          f"stalls {args.stall_rate:.1%} x {args.stall_seconds:g}s; "
+          f"stores in {workdir}; baseline RSS {_rss_mb() or 0:.0f} MB")
+    print(f"{'sessions':>8} {'at once':>7} {'done':>5} {'per min':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'script s':>8} {'calls':>6} {'errors':>6} {'RSS MB':>7} {'peak MB':>7}")
+    results, offset = [], 0
+    for concurrency in levels:
+        result = run_level(concurrency, args.rounds, jds, secrets, offset)
+        offset += result["sessions"]
+        results.append(result)
+        print(f"{result['sessions']:8d} {concurrency:7d} {result['completed']:5d} {result['throughput_per_min']:8.1f} "
+              f"{result['p50_s']:7.2f} {result['p95_s']:7.2f} {result['p99_s']:7.2f} {result['script_s']:8.2f} "
+              f"{result['model_calls']:6d} {result['injected_errors']:6d} {result['rss_mb'] or 0:7.0f} "
+              f"{result['peak_rss_mb']:7.0f}")
+        failed = {k: v for k, v in result["outcomes"].items() if k not in ("ok", "degraded")}
+        if failed:
+            print("    failed sessions:", ", ".join(f"{v}x {k}" for k, v in failed.items()))
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"args": vars(args), "levels": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Microbenchmarks for the text-cleaning and report-rendering hot paths.
+
+    python -m benchmarks.run                      # print timings
+    python -m benchmarks.run --save baseline.json # record a baseline
+    python -m benchmarks.run --compare baseline.json --threshold 1.25
+
+Runs fully offline on the synthetic corpus in benchmarks/corpus.py. With
+--compare the exit status is 1 when any case is slower than the baseline
+by more than the threshold factor, so it can gate a deploy.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks import corpus
+from docmodel import layout, parse, to_latin1
+from pipeline import extract_section
+from reports import generate_pdf_simple, generate_structured_docx, generate_structured_pdf
+
+
+def _cases(pages):
+    resume = corpus.resume_text(pages)
+    markdown = corpus.llm_markdown(pages)
+    analysis = corpus.ats_analysis(pages)
+    metrics, sections = corpus.report_inputs(pages)
+    blocks = parse(markdown)
+    return {
+        "to_latin1": lambda: to_latin1(markdown),
+        # parse() is memoized per text; time the parse itself
+        "docmodel_parse": lambda: parse.__wrapped__(markdown),
+        "docmodel_layout": lambda: list(layout(blocks, "numbered")),
+        "extract_section": lambda: extract_section(analysis, "personalized suggestions"),
+        "generate_pdf_simple": lambda: generate_pdf_simple(resume),
+        "generate_structured_pdf": lambda: generate_structured_pdf(metrics, *sections),
+        "generate_structured_docx": lambda: generate_structured_docx(metrics, *sections),
+    }
+
+
+def measure(fn, repeat, min_time=0.05):
+    fn()  # warm caches and imports
+    started = time.perf_counter()
+    fn()
+    single = time.perf_counter() - started
+    # batch fast functions so each sample is long enough to time reliably
+    number = max(1, int(min_time / max(single, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": statistics.median(samples) * 1e3, "min_ms": min(samples) * 1e3, "peak_kb": peak / 1024}
+
+
+def run(sizes, repeat, only=None):
+    results = {}
+    for size in sizes:
+        for name, fn in _cases(corpus.SIZES[size]).items():
+            if only and name not in only:
+                continue
+            results[f"{name}[{size}]"] = measure(fn, repeat)
+            r = results[f"{name}[{size}]"]
+            print(f"{name + '[' + size + ']':<34} {r['median_ms']:>10.3f} ms  (min {r['min_ms']:.3f})"
+                  f"  peak {r['peak_kb']:>9.1f} KB", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n{'case':<34} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for case, now in results.items():
+        before = baseline.get(case)
+        if not before:
+            continue
+        ratio = now["median_ms"] / before["median_ms"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{case:<34} {before['median_ms']:>10.3f} {now['median_ms']:>10.3f} {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(case)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(corpus.SIZES), help="comma-separated: 1p,5p,20p")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="comma-separated function names")
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown factor")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    only = set(args.only.split(",")) if args.only else None
+    results = run(sizes, args.repeat, only)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, fh, indent=2)
+        print(f"\nbaseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}x", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
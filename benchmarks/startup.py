@@ -0,0 +1,86 @@
+"""Cold-start profile: time-to-first-render of app.py on a fresh interpreter.
+
+    python -m benchmarks.startup                 # 5 fresh workers, top 15 imports
+    python -m benchmarks.startup --runs 10 --top 25
+
+Every run starts a new Python process, imports Streamlit's AppTest and
+times the first full script run with no user input (the Home tab), the
+same work a fresh Streamlit worker does before its first paint. The import
+breakdown comes from `-X importtime` of the slowest-to-import top-level
+packages, and the report lists which heavy libraries the first render
+actually loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["google.generativeai", "google.api_core", "grpc", "pandas", "PIL.Image", "PyPDF2", "fpdf", "docx",
+         "lxml.etree", "pydantic"]
+
+_WORKER = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.secrets["GOOGLE_API_KEY"] = "startup-profile"
+at.run()
+done = time.perf_counter()
+print(json.dumps({
+    "streamlit_s": imported - started,
+    "first_render_s": done - imported,
+    "errors": [e.value for e in at.exception],
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY,)
+
+
+def _import_times(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | <indented name>"
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith(" ") or name.startswith("  "):
+            continue  # only top-level imports; their cumulative time covers the rest
+        out.append((int(cumulative) / 1e6, name.strip()))
+    return out
+
+
+def profile_once():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _WORKER],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = _import_times(proc.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [profile_once() for _ in range(args.runs)]
+    first = sorted(r["first_render_s"] for r in runs)
+    print(f"streamlit import      median {statistics.median(r['streamlit_s'] for r in runs):.3f}s")
+    print(f"time to first render  median {statistics.median(first):.3f}s  "
+          f"min {first[0]:.3f}s  max {first[-1]:.3f}s  ({args.runs} fresh workers)")
+    if runs[-1]["errors"]:
+        print("script errors:", *runs[-1]["errors"], sep="\n  ")
+    print("heavy modules loaded by first render:", ", ".join(runs[-1]["loaded"]) or "none")
+
+    print(f"\n{'top-level import':40} {'cumulative s':>12}")
+    for seconds, name in sorted(runs[-1]["imports"], reverse=True)[:args.top]:
+        print(f"{name:40} {seconds:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Single-pass export of every deliverable as one ZIP.
+
+`Exporter.start` renders a session's downloads (the resume, cover letter
+and tailored resume PDFs and the full PDF and DOCX reports) at the same
+time on a small thread pool, all from the one set of section texts the
+Analysis tab read. Each file goes into the archive as soon as it is
+rendered, and a `manifest.json` with the scores and the size and SHA-256 of
+every file closes it. Files the session already prepared are packed as they
+are. The worker hands the finished ZIP, and every file it rendered, to the
+session's `SessionData` under the keys the app gave it, so asking again for
+the same bundle or for one of its files is served without rendering
+anything. An `Export` itself only tracks progress.
+"""
+import hashlib
+import io
+import json
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from instrumentation import stage
+from session_memory import SessionRegistry
+
+EXPORT_WORKERS = 4
+MANIFEST_NAME = "manifest.json"
+# already compressed; deflating them again only costs time
+STORED_SUFFIXES = (".pdf", ".docx")
+# a finished export only keeps its progress and error; its bytes are in the session's store
+EXPORT_TTL = 600
+
+
+class Export:
+    def __init__(self, key, names):
+        self.key = key
+        self.names = names
+        self.future = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def add(self, name, data):
+        with self._lock:
+            self._entries[name] = {"name": name, "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+    def entries(self):
+        # manifest rows of the files written so far, in bundle order
+        with self._lock:
+            return [self._entries[name] for name in self.names if name in self._entries]
+
+    def progress(self):
+        # (files in the archive, files in the bundle)
+        with self._lock:
+            return len(self._entries), len(self.names)
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def memory_bytes(self):
+        # the archive being written; once it is in the session's store only the manifest rows remain
+        if self.done():
+            return 0
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._entries.values())
+
+
+class Exporter:
+    def __init__(self, workers=EXPORT_WORKERS):
+        self._render = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        # one writer per running export; it must never wait on a render slot it holds
+        self._writers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export-zip")
+        self._by_session = SessionRegistry(ttl=EXPORT_TTL)
+
+    def start(self, session, store, key, files, manifest):
+        """Bundle `files` into `store[key]`; returns the session's export.
+
+        `files` is [(name, store key, bytes or a no-argument render function), ...];
+        each rendered file is also saved in `store` under its own key. A session
+        has one export; while it runs, starting the same key returns it.
+        """
+        export = self._by_session.get(session)
+        if export is not None and export.key == key and not export.done():
+            return export
+        export = Export(key, [name for name, _, _ in files])
+        self._by_session.put(session, export)
+        export.future = self._writers.submit(self._build, export, store, files, manifest)
+        return export
+
+    def get(self, session):
+        return self._by_session.get(session)
+
+    def memory_usage(self):
+        return self._by_session.memory_usage()
+
+    def discard(self, session, export):
+        # forget a failed export so it can be started again, unless a newer one replaced it
+        self._by_session.pop(session, export)
+
+    def _build(self, export, store, files, manifest):
+        rendered = {self._render.submit(render): (name, file_key)
+                    for name, file_key, render in files if callable(render)}
+        buffer = io.BytesIO()
+        try:
+            with stage("export:bundle", files=len(files), rendered=len(rendered)) as record:
+                with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                    for name, _, data in files:
+                        if not callable(data):
+                            self._write(archive, export, name, data)
+                    for future in as_completed(rendered):
+                        name, file_key = rendered[future]
+                        data = future.result()
+                        self._write(archive, export, name, data)
+                        # the single download of this file is ready now too
+                        store[file_key] = data
+                    archive.writestr(MANIFEST_NAME, json.dumps(dict(
+                        manifest,
+                        created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                        files=export.entries(),
+                    ), indent=2))
+                record["bytes"] = buffer.tell()
+                store[export.key] = buffer.getvalue()
+        except Exception as exc:
+            for future in rendered:
+                future.cancel()
+            export.error = str(exc) or type(exc).__name__
+
+    @staticmethod
+    def _write(archive, export, name, data):
+        compress = zipfile.ZIP_STORED if name.endswith(STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
+        archive.writestr(name, data, compress_type=compress)
+        export.add(name, data)
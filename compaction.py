@@ -0,0 +1,128 @@
+"""Prompt input compaction under a token budget.
+
+`clean_text` removes what PDF extraction adds but the model never needs:
+running headers and footers repeated across pages, page numbers, repeated
+long lines, and runs of whitespace. `fit_to_budget` then trims text that
+is still over its token budget by section, dropping low-value sections
+(references, hobbies, benefits, ...) before touching experience or
+requirements. A normal one- or two-page resume comes out of both unchanged
+apart from whitespace.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+from llm import estimate_tokens
+
+# extraction.extract_text separates pages with a form feed
+PAGE_BREAK = "\f"
+# input tokens (resume + JD) allowed per prompt; the instructions come on top
+PROMPT_TOKEN_BUDGET = 6000
+# the JD's share of a resume + JD prompt when both are over budget
+JD_SHARE = 0.4
+# shorter repeated lines are usually structure ("Responsibilities:"), not noise
+DUPLICATE_MIN_CHARS = 40
+EDGE_LINES = 2
+TRUNCATION_NOTE = "[...]"
+
+_SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:/|of)\s*\d{1,3})?$", re.IGNORECASE)
+_HEADING_RE = re.compile(r"^(?:[A-Z][A-Z0-9 &/,'()-]{2,40}|[A-Z][\w &/,'()-]{2,40}:)$")
+
+_HIGH_PRIORITY = ("summary", "profile", "objective", "skill", "experience", "employment", "work",
+                  "requirement", "qualification", "responsibilit", "must have", "what you")
+_LOW_PRIORITY = ("reference", "interest", "hobb", "volunteer", "publication", "award", "language",
+                 "benefit", "perk", "equal opportunity", "about us", "who we are", "salary", "compensation")
+
+
+def _page_margins(pages):
+    # lines at the top or bottom of at least half the pages are running headers/footers
+    counts = Counter()
+    for lines in pages:
+        counts.update({line for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:] if line})
+    min_pages = max(2, (len(pages) + 1) // 2)
+    return {line for line, n in counts.items() if n >= min_pages}
+
+
+@lru_cache(maxsize=64)
+def clean_text(text: str) -> str:
+    pages = [[_SPACE_RE.sub(" ", line).strip() for line in page.splitlines()] for page in text.split(PAGE_BREAK)]
+    margins = _page_margins(pages) if len(pages) > 1 else set()
+    out, seen = [], set()
+    for lines in pages:
+        edges = set(range(EDGE_LINES)) | set(range(len(lines) - EDGE_LINES, len(lines)))
+        for i, line in enumerate(lines):
+            if not line:
+                if out and out[-1]:
+                    out.append("")
+                continue
+            if i in edges and _PAGE_NUMBER_RE.match(line):
+                continue
+            # the first copy of a header (often the candidate's name) stays
+            if line in seen and (line in margins or len(line) >= DUPLICATE_MIN_CHARS):
+                continue
+            seen.add(line)
+            out.append(line)
+    return "\n".join(out).strip()
+
+
+def _sections(text):
+    # [[heading line, body lines...], ...]; text before the first heading is its own section
+    sections = [[]]
+    for line in text.splitlines():
+        if _HEADING_RE.match(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return sections
+
+
+def _priority(section):
+    if section is None:
+        return 0
+    heading = section.lower()
+    if any(word in heading for word in _LOW_PRIORITY):
+        return 2
+    return 0 if any(word in heading for word in _HIGH_PRIORITY) else 1
+
+
+def fit_to_budget(text: str, budget: int) -> str:
+    """Trim `text` to about `budget` tokens, keeping its most useful sections whole."""
+    if estimate_tokens(text) <= budget:
+        return text
+    sections = _sections(text)
+    order = sorted(range(len(sections)),
+                   key=lambda i: (_priority(sections[i][0] if i else None), i))
+    # estimate_tokens is chars / 4, so the budget is tracked in characters
+    remaining = budget * 4 - len(TRUNCATION_NOTE) - 1
+    kept = {}
+    for i in order:
+        lines = sections[i]
+        size = sum(len(line) + 1 for line in lines)
+        if size <= remaining:
+            kept[i] = lines
+            remaining -= size
+            continue
+        head = []
+        for line in lines:
+            if len(line) + 1 > remaining:
+                break
+            head.append(line)
+            remaining -= len(line) + 1
+        kept[i] = head + [TRUNCATION_NOTE]
+        break
+    return "\n".join(line for i in sorted(kept) for line in kept[i])
+
+
+def compact_pair(rt: str, jd: str, budget: int = PROMPT_TOKEN_BUDGET):
+    """Clean resume and JD and split `budget` between them; returns `(rt, jd)`."""
+    rt, jd = clean_text(rt), clean_text(jd)
+    rt_tokens, jd_tokens = estimate_tokens(rt), estimate_tokens(jd)
+    if rt_tokens + jd_tokens <= budget:
+        return rt, jd
+    # whatever one side doesn't need goes to the other
+    jd_budget = min(jd_tokens, max(int(budget * JD_SHARE), budget - rt_tokens))
+    return fit_to_budget(rt, budget - jd_budget), fit_to_budget(jd, jd_budget)
+
+
+def compact_jd(jd: str, budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    return fit_to_budget(clean_text(jd), budget)
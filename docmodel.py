@@ -0,0 +1,92 @@
+"""Single-pass parse of LLM Markdown into a small block model for the renderers.
+
+Each section's text becomes a tuple of `Block(kind, text, number)` where
+kind is one of "heading", "paragraph", "bullet", "numbered" or "blank" and
+`number` is a numbered item's own number in the source. Markers and
+inline emphasis are stripped once here, and the parse is cached per text, so
+the PDF, DOCX and plain-text renderers never re-scan the Markdown.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+Block = namedtuple("Block", "kind text number", defaults=(None,))
+
+_LINE_RE = re.compile(r"^\s*(?:(#{1,6})\s*|([-*+•])\s+|(\d{1,3})[.)]\s+)?(.*?)\s*$")
+_RULE_RE = re.compile(r"^\s*([-*_])(?:\s*\1){2,}\s*$")
+_EMPHASIS_RE = re.compile(r"\*\*|__")
+
+
+@lru_cache(maxsize=256)
+def parse(text: str) -> tuple:
+    blocks = []
+    for line in text.splitlines():
+        if not line.strip() or _RULE_RE.match(line):
+            blocks.append(Block("blank", ""))
+            continue
+        heading, bullet, number, body = _LINE_RE.match(line).groups()
+        body = _EMPHASIS_RE.sub("", body)
+        if heading:
+            kind = "heading"
+        elif bullet:
+            kind = "bullet"
+        elif number:
+            blocks.append(Block("numbered", body, int(number)))
+            continue
+        else:
+            kind = "paragraph"
+        blocks.append(Block(kind, body))
+    return tuple(blocks)
+
+
+# the one place typographic characters are mapped for the Latin-1 PDF fonts
+LATIN1_TABLE = {
+    "\u2022": "-", "\u2013": "-", "\u2014": "-",
+    "\u2018": "'", "\u2019": "'", "\u201c": '"',
+    "\u201d": '"', "\u2026": "...",
+}
+
+
+def to_latin1(text: str) -> str:
+    # most LLM output is plain ASCII; otherwise map the table's characters
+    # (each a single C-level scan) and drop anything else non-Latin-1
+    if text.isascii():
+        return text
+    for orig, repl in LATIN1_TABLE.items():
+        if orig in text:
+            text = text.replace(orig, repl)
+    return text.encode("latin-1", "ignore").decode("latin-1")
+
+
+def layout(blocks, style="text"):
+    """Yield `(kind, prefix, text)` lines for a renderer.
+
+    `style` is the section's list style: in "bullet" or "numbered" sections
+    every paragraph line becomes a list item and blank lines are dropped.
+    Numbered items keep the number the source gives them; paragraphs turned
+    into numbered items count on from the item before. The count restarts
+    at every heading and bullet, and at blank lines in "text" sections; a
+    list section stays one list across the blank lines between its items.
+    """
+    number = 0
+    for block in blocks:
+        kind = block.kind
+        if kind in ("heading", "bullet") or (kind == "blank" and style == "text"):
+            number = 0
+        if kind == "blank":
+            if style == "text":
+                yield "blank", "", ""
+            continue
+        if kind == "paragraph" and style != "text":
+            kind = style
+        if kind == "numbered":
+            number = block.number or number + 1
+            yield kind, f"{number}. ", block.text
+        elif kind == "bullet":
+            yield kind, "• ", block.text
+        else:
+            yield kind, "", block.text
+
+
+def text_lines(blocks, style="text"):
+    return [prefix + text for _, prefix, text in layout(blocks, style)]
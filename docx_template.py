@@ -0,0 +1,121 @@
+"""Template-backed DOCX rendering for the structured report.
+
+The report skeleton (title, scores heading and an empty scores table, on the
+python-docx default styles) is built and parsed once per process. Each report
+deep-copies the skeleton's `word/document.xml` tree, inserts the table rows
+and all section paragraphs in one bulk XML parse, and writes the package back
+out with every other part reused as-is.
+"""
+import copy
+import io
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+
+from docmodel import layout, parse
+
+DOCUMENT_PART = "word/document.xml"
+REPORT_TITLE = "PathPinpoint Full Report"
+SCORES_TITLE = "ATS & Similarity Scores"
+
+# characters XML 1.0 cannot carry; python-docx would reject them outright
+_INVALID_XML_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _run(text, bold=False):
+    text = escape(_INVALID_XML_RE.sub("", text))
+    # tabs become <w:tab/>, as python-docx does for add_paragraph/add_run
+    text = text.replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+    rpr = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{text}</w:t></w:r>'
+
+
+def _paragraph(text="", style_id=None, bold=False):
+    ppr = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+    return f"<w:p>{ppr}{_run(text, bold) if text else ''}</w:p>"
+
+
+class DocxTemplate:
+    def __init__(self):
+        doc = Document()
+        title = doc.add_heading(REPORT_TITLE, level=0)
+        title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+        doc.add_heading(SCORES_TITLE, level=1)
+        table = doc.add_table(rows=1, cols=2)
+        hdr = table.rows[0].cells
+        hdr[0].text, hdr[1].text = "Metric", "Value"
+        # an empty row is the prototype for every metric row
+        table.add_row()
+
+        styles = doc.styles
+        self.heading_id = styles["Heading 1"].style_id
+        self.list_ids = {"bullet": styles["List Bullet"].style_id, "numbered": styles["List Number"].style_id}
+
+        buf = io.BytesIO()
+        doc.save(buf)
+        with zipfile.ZipFile(buf) as zf:
+            self.parts = [(info, zf.read(info)) for info in zf.infolist()]
+        self.document = etree.fromstring(next(d for i, d in self.parts if i.filename == DOCUMENT_PART))
+        # element paths are resolved once; copies keep the same structure
+        body = self.document.find(qn("w:body"))
+        self._table_index = list(body).index(body.find(qn("w:tbl")))
+        self._row = body.find(qn("w:tbl")).findall(qn("w:tr"))[-1]
+        self._row.getparent().remove(self._row)
+        self._wrapper = f'<w:body xmlns:w="{nsmap["w"]}">{{}}</w:body>'
+
+    def _section_xml(self, title, style, body, out):
+        out.append(_paragraph(title, self.heading_id))
+        for kind, prefix, text in layout(parse(body), style):
+            if kind == "heading":
+                out.append(_paragraph(text, bold=True))
+            elif style == "text":
+                # list items inside prose keep their marker, as plain paragraphs
+                out.append(_paragraph(prefix + text))
+            else:
+                out.append(_paragraph(text, self.list_ids[kind]))
+
+    def render(self, metrics, sections):
+        """`sections` is an iterable of `(title, style, body)`; returns .docx bytes."""
+        document = copy.deepcopy(self.document)
+        body = document.find(qn("w:body"))
+
+        table = body[self._table_index]
+        for label, value in metrics:
+            row = copy.deepcopy(self._row)
+            for cell, text in zip(row.iter(qn("w:tc")), (label, value)):
+                if text:
+                    cell.find(qn("w:p")).append(etree.fromstring(self._wrapper.format(_run(text)))[0])
+            table.append(row)
+
+        out = []
+        for title, style, text in sections:
+            self._section_xml(title, style, text, out)
+        # one parse for every section paragraph, inserted ahead of the section properties
+        sect_pr = body.find(qn("w:sectPr"))
+        for element in etree.fromstring(self._wrapper.format("".join(out))):
+            sect_pr.addprevious(element)
+
+        xml = etree.tostring(document, xml_declaration=True, encoding="UTF-8", standalone=True)
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for info, data in self.parts:
+                zf.writestr(info, xml if info.filename == DOCUMENT_PART else data)
+        return buf.getvalue()
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_template():
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = DocxTemplate()
+        return _template
@@ -0,0 +1,223 @@
+import hashlib
+import io
+import multiprocessing
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BYTES = 10 * 1024 * 1024
+MAX_PAGES = 50
+PAGE_TIMEOUT = 5.0
+# below this many pages one worker reads them all; splitting costs more than it saves
+PARALLEL_MIN_PAGES = 4
+POOL_SIZE = 4
+# how long a request waits for a free worker before it is turned away
+QUEUE_TIMEOUT = 30.0
+# a new worker's start-up (spawn, PyPDF2 import) doesn't count against a page deadline
+STARTUP_TIMEOUT = 60.0
+CACHE_ENTRIES = 64
+
+
+class ExtractionError(ValueError):
+    pass
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_workers = None
+_workers_lock = threading.Lock()
+# held while __main__ is swapped out for a worker start; workers start from several threads at once
+_spawn_lock = threading.Lock()
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _pdf():
+    # PyPDF2 is only needed once a resume is uploaded, not for the first page paint
+    import PyPDF2
+
+    return PyPDF2
+
+
+def _read(data, start=None, stop=None):
+    # the page count, or the texts of pages start..stop-1
+    reader = _pdf().PdfReader(io.BytesIO(data))
+    if start is None:
+        return len(reader.pages)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _serve(conn):
+    # worker process: one request at a time until the parent closes the pipe
+    _pdf()
+    conn.send((True, None))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, _read(*request)))
+        except Exception as exc:
+            conn.send((False, str(exc) or type(exc).__name__))
+
+
+class _Worker:
+    def __init__(self):
+        # spawn: forking a threaded Streamlit server is not safe. Spawned workers
+        # re-import __main__, which Streamlit points at the app script, so they
+        # start from a blank one instead of running the whole app again
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        with _spawn_lock:
+            main = sys.modules["__main__"]
+            sys.modules["__main__"] = types.ModuleType("__main__")
+            try:
+                self.process = context.Process(target=_serve, args=(child,), daemon=True)
+                self.process.start()
+            finally:
+                sys.modules["__main__"] = main
+        child.close()
+        if not self.conn.poll(STARTUP_TIMEOUT):
+            self.kill()
+            raise ExtractionError("The PDF reader did not start; please try again.")
+        self.conn.recv()
+
+    def call(self, timeout, request):
+        # raises TimeoutError past `timeout`, EOFError if the worker died
+        self.conn.send(request)
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        return self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class _Workers:
+    """Worker processes handed out to one request at a time.
+
+    A request that runs past its deadline kills only the worker it holds;
+    everyone else's extractions carry on, and a fresh worker replaces it on
+    the next request.
+    """
+
+    def __init__(self, size):
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def run(self, timeout, request):
+        if not self._slots.acquire(timeout=QUEUE_TIMEOUT):
+            raise ExtractionError("PDF extraction is busy; please try again in a moment.")
+        try:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                worker = _Worker()
+            try:
+                result = worker.call(timeout, request)
+            except BaseException:
+                worker.kill()
+                raise
+            with self._lock:
+                self._idle.append(worker)
+            return result
+        finally:
+            self._slots.release()
+
+
+def _get_workers():
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            _workers = _Workers(POOL_SIZE)
+        return _workers
+
+
+def configure_workers(size):
+    """Set how many extraction worker processes may run at once (before first use)."""
+    global _workers
+    with _workers_lock:
+        _workers = _Workers(max(1, size))
+
+
+def _read_in_worker(data, timeout, start=None, stop=None):
+    try:
+        ok, result = _get_workers().run(timeout, (data, start, stop))
+    except TimeoutError:
+        raise
+    except (EOFError, OSError):
+        # the worker died mid-request, or while idle
+        raise ExtractionError("The PDF reader crashed on this file.") from None
+    if not ok:
+        raise ExtractionError(f"Could not read PDF: {result}")
+    return result
+
+
+def _extract_range(data, start, stop, page_timeout):
+    try:
+        return _read_in_worker(data, page_timeout * (stop - start), start, stop)
+    except TimeoutError:
+        pages = f"Page {start + 1}" if stop - start == 1 else f"Pages {start + 1}-{stop}"
+        raise ExtractionError(f"{pages} took longer than {page_timeout:g}s per page to read.") from None
+
+
+def _extract_parallel(data, n_pages, page_timeout):
+    chunk = -(-n_pages // POOL_SIZE)
+    ranges = [(s, min(s + chunk, n_pages)) for s in range(0, n_pages, chunk)]
+    pool = ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="extract")
+    try:
+        futures = [pool.submit(_extract_range, data, s, e, page_timeout) for s, e in ranges]
+        return [text for future in futures for text in future.result()]
+    finally:
+        # the other ranges stop at their own deadlines
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_text(data: bytes, max_pages=MAX_PAGES, max_bytes=MAX_BYTES, page_timeout=PAGE_TIMEOUT,
+                 parallel=True) -> str:
+    """Extract the text of a PDF, caching the result by the file's SHA-256.
+
+    Parsing runs in worker processes, each held by one request and killed
+    when the request passes its deadline. `parallel=False` reads every page
+    in one worker instead of splitting them across several.
+
+    Raises ExtractionError for files that are too large, have too many pages,
+    cannot be parsed, or take longer than `page_timeout` seconds per page.
+    """
+    if len(data) > max_bytes:
+        raise ExtractionError(
+            f"PDF is {len(data) / 1024 / 1024:.1f} MB; the limit is {max_bytes / 1024 / 1024:.0f} MB."
+        )
+    digest = file_digest(data)
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    try:
+        n_pages = _read_in_worker(data, page_timeout)
+    except TimeoutError:
+        raise ExtractionError(f"PDF took longer than {page_timeout:g}s to open.") from None
+    if n_pages > max_pages:
+        raise ExtractionError(f"PDF has {n_pages} pages; the limit is {max_pages}.")
+
+    if not parallel or n_pages < PARALLEL_MIN_PAGES:
+        texts = _extract_range(data, 0, n_pages, page_timeout) if n_pages else []
+    else:
+        texts = _extract_parallel(data, n_pages, page_timeout)
+
+    # pages end with a form feed, so prompt compaction can spot running headers and footers
+    text = "\n\f".join(texts)
+    with _cache_lock:
+        _cache[digest] = text
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return text
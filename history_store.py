@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "history.sqlite3")
+PREVIEW_CHARS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    session    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    jd_preview TEXT NOT NULL,
+    jd         BLOB NOT NULL,
+    analysis   BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_session_time ON history(session, created_at DESC);
+"""
+
+
+def _pack(text):
+    return zlib.compress(text.encode("utf-8"))
+
+
+def _unpack(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class HistoryStore:
+    """Analysis history on disk, so sessions only hold the page being viewed.
+
+    Large texts are zlib-compressed; listing reads only the small preview
+    columns and full texts are loaded one entry at a time.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, session, jd, analysis, created_at=None):
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO history(session, created_at, jd_preview, jd, analysis) VALUES (?, ?, ?, ?, ?)",
+                (session, created_at or time.time(), jd[:PREVIEW_CHARS], _pack(jd), _pack(analysis)),
+            )
+            return cur.lastrowid
+
+    def count(self, session):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM history WHERE session = ?", (session,)).fetchone()[0]
+
+    def page(self, session, limit=10, offset=0):
+        # newest first: [(id, created_at, jd_preview), ...]
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT id, created_at, jd_preview FROM history WHERE session = ? "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (session, limit, offset),
+            ).fetchall()
+
+    def get(self, session, entry_id):
+        # (jd, analysis) for one entry, or None; scoped to the session that wrote it
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT jd, analysis FROM history WHERE id = ? AND session = ?", (entry_id, session)
+            ).fetchone()
+        return (_unpack(row[0]), _unpack(row[1])) if row else None
@@ -0,0 +1,230 @@
+"""Per-stage timing for analyses, exported as JSONL and Prometheus text.
+
+A `run` groups the stages of one user action (e.g. one "Analyze & Tailor"
+click). `stage()` times a block and records it on the current run; code
+running inside a stage can attach fields such as token counts with
+`annotate()`. Both are contextvar-based, so they follow work into threads
+started with `contextvars.copy_context().run`. Every finished stage is
+appended to a JSONL file, which is rotated once it grows past
+`METRICS_MAX_BYTES`. `summarize()` aggregates the latest `SUMMARY_WINDOW`
+records across sessions from memory: the tail of the file as it was when
+the process started, followed by what the process has recorded since.
+The Prometheus export takes its quantiles from that window, but its
+`_sum`, `_count` and `_total` series from counters kept for the life of the
+process, so they only ever grow (a restart shows up as a counter reset).
+"""
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+DEFAULT_METRICS_PATH = os.path.join(".cache", "metrics.jsonl")
+DEFAULT_PROM_PATH = os.path.join(".cache", "metrics.prom")
+# only the most recent records are aggregated, which keeps summaries cheap
+SUMMARY_WINDOW = 5000
+# past this the file moves to `<path>.1`, replacing the previous one
+METRICS_MAX_BYTES = 16 * 1024 * 1024
+_TAIL_BLOCK = 64 * 1024
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+class MetricsSink:
+    def __init__(self, path=DEFAULT_METRICS_PATH, window=SUMMARY_WINDOW, max_bytes=METRICS_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        recent = self._tail(self.path, window)
+        if len(recent) < window:
+            # just rotated; the rest of the window is in the previous file
+            recent = self._tail(self.path + ".1", window - len(recent)) + recent
+        self._recent = deque(recent, maxlen=window)
+        # per-stage totals of every record this process wrote
+        self._totals = defaultdict(Counter)
+
+    @staticmethod
+    def _tail(path, count):
+        # the last `count` records of a file, reading backwards only as far as needed
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as fh:
+            end = fh.seek(0, os.SEEK_END)
+            start, data = end, b""
+            while start > 0 and data.count(b"\n") <= count:
+                start = max(0, start - _TAIL_BLOCK)
+                fh.seek(start)
+                data = fh.read(end - start)
+        lines = data.splitlines()
+        if start > 0:
+            lines = lines[1:]  # the first line was cut by the block boundary
+        out = []
+        for line in lines[-count:]:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue  # torn line from a crash
+        return out
+
+    def write(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._recent.append(dict(record))
+            totals = self._totals[record["stage"]]
+            totals["count"] += 1
+            totals["sum"] += record["seconds"]
+            totals["errors"] += bool(record.get("error"))
+            totals["cache_hits"] += bool(record.get("cache_hit"))
+            totals["tokens_in"] += record.get("tokens_in", 0)
+            totals["tokens_out"] += record.get("tokens_out", 0)
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                size = fh.tell()
+            if size > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+
+    def records(self, window=SUMMARY_WINDOW):
+        with self._lock:
+            recent = list(self._recent)
+        return recent[-window:]
+
+    def totals(self):
+        with self._lock:
+            return {name: dict(totals) for name, totals in self._totals.items()}
+
+
+sink = MetricsSink()
+
+
+class Run:
+    def __init__(self, name, session):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.session = session
+        self.started = time.time()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.stages.append(record)
+
+    def rows(self):
+        with self._lock:
+            return [dict(r) for r in self.stages]
+
+
+@contextmanager
+def run(name, session="default"):
+    current = Run(name, session)
+    token = _current_run.set(current)
+    try:
+        with stage(name):
+            yield current
+    finally:
+        _current_run.reset(token)
+        write_prometheus()
+
+
+@contextmanager
+def stage(name, **fields):
+    record = {"stage": name, **fields}
+    token = _current_stage.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except Exception as exc:
+        record["error"] = type(exc).__name__
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 6)
+        _current_stage.reset(token)
+        current = _current_run.get()
+        record["ts"] = time.time()
+        if current is not None:
+            record["run"], record["session"] = current.id, current.session
+            current.add(record)
+        sink.write(record)
+
+
+def annotate(**fields):
+    record = _current_stage.get()
+    if record is not None:
+        record.update(fields)
+
+
+def current_stage_name():
+    record = _current_stage.get()
+    return record["stage"] if record is not None else None
+
+
+def _quantile(sorted_values, q):
+    # nearest-rank quantile
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def summarize(records=None):
+    """Aggregate stage records into per-stage count, p50, p95, tokens and cache hits."""
+    records = sink.records() if records is None else records
+    by_stage = defaultdict(list)
+    for r in records:
+        by_stage[r["stage"]].append(r)
+    summary = {}
+    for name, rows in sorted(by_stage.items()):
+        durations = sorted(r["seconds"] for r in rows)
+        summary[name] = {
+            "count": len(rows),
+            "sum": sum(durations),
+            "p50": _quantile(durations, 0.50),
+            "p95": _quantile(durations, 0.95),
+            "errors": sum(1 for r in rows if r.get("error")),
+            "cache_hits": sum(1 for r in rows if r.get("cache_hit")),
+            "tokens_in": sum(r.get("tokens_in", 0) for r in rows),
+            "tokens_out": sum(r.get("tokens_out", 0) for r in rows),
+        }
+    return summary
+
+
+def prometheus_text(summary=None, totals=None):
+    # quantiles over the recent window; sums, counts and totals since the process started
+    summary = summarize() if summary is None else summary
+    totals = sink.totals() if totals is None else totals
+    lines = [
+        "# HELP pathpinpoint_stage_seconds Duration of analysis stages.",
+        "# TYPE pathpinpoint_stage_seconds summary",
+    ]
+    for name in sorted(set(summary) | set(totals)):
+        if name in summary:
+            for q, key in (("0.5", "p50"), ("0.95", "p95")):
+                lines.append(f'pathpinpoint_stage_seconds{{stage="{name}",quantile="{q}"}} {summary[name][key]:.6f}')
+        t = totals.get(name, {})
+        lines.append(f'pathpinpoint_stage_seconds_sum{{stage="{name}"}} {t.get("sum", 0):.6f}')
+        lines.append(f'pathpinpoint_stage_seconds_count{{stage="{name}"}} {t.get("count", 0)}')
+    for metric, key, kind in [
+        ("pathpinpoint_stage_errors_total", "errors", "counter"),
+        ("pathpinpoint_llm_cache_hits_total", "cache_hits", "counter"),
+        ("pathpinpoint_llm_tokens_in_total", "tokens_in", "counter"),
+        ("pathpinpoint_llm_tokens_out_total", "tokens_out", "counter"),
+    ]:
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f'{metric}{{stage="{name}"}} {t[key]}' for name, t in sorted(totals.items()) if t.get(key))
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=DEFAULT_PROM_PATH):
+    # node_exporter textfile-collector style: write then atomically rename
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(prometheus_text())
+    os.replace(tmp, path)
@@ -0,0 +1,363 @@
+"""Background analysis jobs with their state in SQLite.
+
+`JobRunner.submit()` stores the job and returns its ID immediately; a worker
+thread runs the section prompts and saves each section as soon as it
+finishes. The Streamlit script only polls the store (plus the in-memory
+text of sections still streaming), so a rerun or tab switch never loses
+work, and a job carries on when its page is closed or reloaded; the finished
+analysis then shows up in the session's history.
+Every job row names the runner that owns it, and that runner refreshes a
+heartbeat on its jobs while they are queued or running. Only a job whose
+owner stopped heartbeating for `JOB_LEASE` seconds is picked up again by
+`resume_unfinished()` (at start-up, and every lease from then on), which
+claims it atomically, so two processes sharing the store never run the same
+job, and skips sections that were already saved. Finished jobs, with their
+compressed resume and JD, are deleted `JOB_RETENTION` after their last
+update.
+
+A run stops waiting once `pipeline.ANALYSIS_BUDGET` (or a section's own
+deadline) has passed since the job was queued, so time spent waiting for a
+worker counts against it. Sections without a result by then are simply not
+saved: the job finishes with them pending, and `regenerate()` sends them
+again one at a time, as does any section that failed.
+"""
+import contextvars
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+from instrumentation import annotate, run
+from llm import DEFAULT_MAX_CONCURRENCY, current_session, fan_out, stream_fan_out
+from pipeline import ANALYSIS_BUDGET, SECTION_LABELS, build_prompts, finalize_sections, section_deadlines
+
+DEFAULT_JOBS_PATH = os.path.join(".cache", "jobs.sqlite3")
+# jobs running at once across all sessions; each one's fan_out caps its own LLM calls
+DEFAULT_WORKERS = 16
+# a runner that hasn't refreshed its jobs' heartbeat for this long is considered gone
+JOB_LEASE = 60
+HEARTBEAT_INTERVAL = 15
+JOB_RETENTION = 30 * 24 * 3600
+ACTIVE = ("queued", "running")
+# saved as the error of a local fallback analysis when the ATS prompt ran out of time
+PENDING_ANALYSIS = "no response within the time budget; showing local scores"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              TEXT PRIMARY KEY,
+    session         TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    mode            TEXT NOT NULL,
+    model           TEXT NOT NULL,
+    max_concurrency INTEGER NOT NULL,
+    resume          BLOB NOT NULL,
+    jd              BLOB NOT NULL,
+    scores          TEXT,
+    stages          TEXT,
+    error           TEXT,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_session_time ON jobs(session, created_at DESC);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status);
+CREATE TABLE IF NOT EXISTS job_sections (
+    job_id TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    text   BLOB,
+    error  TEXT,
+    PRIMARY KEY (job_id, key)
+);
+"""
+_ADDED_COLUMNS = [("owner", "TEXT"), ("heartbeat", "REAL"), ("queued_at", "REAL")]
+
+
+def _pack(text):
+    return zlib.compress(text.encode("utf-8"))
+
+
+def _unpack(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else ""
+
+
+class JobStore:
+    def __init__(self, path=DEFAULT_JOBS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # columns added after the first release; older stores gain them here
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in _ADDED_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, session, mode, model, max_concurrency, rt, jd, owner=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs(id, session, status, mode, model, max_concurrency, resume, jd, created_at,"
+                " updated_at, owner, heartbeat, queued_at) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, session, mode, model, max_concurrency, _pack(rt), _pack(jd), now, now, owner, now, now),
+            )
+        return job_id
+
+    def claim(self, job_id, owner, lease=JOB_LEASE):
+        """Mark an active job running for `owner` unless another live owner holds it; True if claimed.
+
+        A job taken over from a runner that stopped gets a fresh time budget.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, updated_at = ?,"
+                " queued_at = CASE WHEN owner = ? THEN COALESCE(queued_at, created_at) ELSE ? END"
+                " WHERE id = ? AND status IN (?, ?) AND (owner IS NULL OR owner = ? OR heartbeat IS NULL"
+                " OR heartbeat < ?)",
+                (owner, now, now, owner, now, job_id, *ACTIVE, owner, now - lease),
+            ).rowcount
+        return claimed == 1
+
+    def requeue(self, job_id, owner):
+        # a finished job back to queued under `owner`; False if it is still active
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = ?, heartbeat = ?, updated_at = ?, queued_at = ?"
+                " WHERE id = ? AND status NOT IN (?, ?)",
+                (owner, now, now, now, job_id, *ACTIVE),
+            ).rowcount == 1
+
+    def heartbeat(self, owner):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)",
+                         (time.time(), owner, *ACTIVE))
+
+    def purge(self, max_age=JOB_RETENTION):
+        """Delete finished jobs last updated more than `max_age` seconds ago; returns how many."""
+        cutoff = time.time() - max_age
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "DELETE FROM job_sections WHERE job_id IN"
+                " (SELECT id FROM jobs WHERE updated_at < ? AND status NOT IN (?, ?))", (cutoff, *ACTIVE))
+            return conn.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN (?, ?)",
+                                (cutoff, *ACTIVE)).rowcount
+
+    def update(self, job_id, status, scores=None, stages=None, error=None):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, scores = COALESCE(?, scores), stages = COALESCE(?, stages),"
+                " error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(scores) if scores is not None else None,
+                 json.dumps(stages) if stages is not None else None, error, time.time(), job_id),
+            )
+
+    def save_section(self, job_id, key, text, error=None):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_sections(job_id, key, text, error) VALUES (?, ?, ?, ?)",
+                (job_id, key, _pack(text) if text is not None else None, error),
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def delete_sections(self, job_id, keys):
+        with self._lock, self._connect() as conn:
+            conn.executemany("DELETE FROM job_sections WHERE job_id = ? AND key = ?",
+                             [(job_id, key) for key in keys])
+
+    def get(self, job_id):
+        # the whole job as a dict, with saved `sections` and section `errors`, or None
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            parts = conn.execute("SELECT key, text, error FROM job_sections WHERE job_id = ?", (job_id,)).fetchall()
+        job = dict(row)
+        job["resume"], job["jd"] = _unpack(job["resume"]), _unpack(job["jd"])
+        job["scores"] = json.loads(job["scores"]) if job["scores"] else None
+        job["queued_at"] = job["queued_at"] or job["created_at"]
+        job["stages"] = json.loads(job["stages"]) if job["stages"] else []
+        # a section can carry both: the local fallback text and the error that caused it
+        job["sections"] = {p["key"]: _unpack(p["text"]) for p in parts if p["text"] is not None}
+        job["errors"] = {p["key"]: p["error"] for p in parts if p["error"] is not None}
+        return job
+
+    def status(self, job_id):
+        # (status, saved section keys) without unpacking any text — cheap enough to poll
+        with self._connect() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            keys = [k for k, in conn.execute("SELECT key FROM job_sections WHERE job_id = ?", (job_id,))]
+        return (row[0], keys) if row else (None, [])
+
+    def unfinished(self, lease=JOB_LEASE):
+        # active jobs whose owner stopped heartbeating, oldest first
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND (owner IS NULL OR heartbeat IS NULL"
+                " OR heartbeat < ?) ORDER BY created_at", (*ACTIVE, time.time() - lease)
+            )]
+
+
+class JobRunner:
+    """Run analysis jobs on a small thread pool, persisting as they go.
+
+    `on_done(job)` is called in the worker once a job has finished, with the
+    same dict `JobStore.get` returns.
+    """
+
+    def __init__(self, store=None, workers=DEFAULT_WORKERS, on_done=None):
+        self.store = store or JobStore()
+        self.on_done = on_done
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        # structured calls, so a job can stop waiting for one at the budget
+        self._calls = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-call")
+        # partial text of sections still streaming, per job; never persisted
+        self._live = {}
+        # jobs sitting in this runner's pool, so a rescan doesn't queue them twice
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._keep_alive, name="job-heartbeat", daemon=True).start()
+
+    def submit(self, session, rt, jd, model, mode="parallel", max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        job_id = self.store.create(session, mode, model, max_concurrency, rt, jd, owner=self.owner)
+        self._enqueue(job_id)
+        return job_id
+
+    def _enqueue(self, job_id, *args):
+        with self._lock:
+            if job_id in self._queued:
+                return False
+            self._queued.add(job_id)
+        self._pool.submit(self._run, job_id, *args)
+        return True
+
+    def _keep_alive(self):
+        # heartbeat this runner's jobs; every lease, adopt jobs of runners that stopped and drop old ones
+        last_scan = time.monotonic()
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.store.heartbeat(self.owner)
+                if time.monotonic() - last_scan >= JOB_LEASE:
+                    last_scan = time.monotonic()
+                    self.resume_unfinished()
+            except sqlite3.Error:
+                continue  # the store is busy or gone; try again next beat
+
+    def stop(self):
+        self._stopped.set()
+
+    def regenerate(self, job_id, keys):
+        """Send the prompts for `keys` (pending or failed sections) again, in the background."""
+        keys = set(keys)
+        if "analysis" in keys:
+            keys.add("recommendations")  # derived from the analysis
+        if not self.store.requeue(job_id, self.owner):
+            return  # still running; its missing sections are sent anyway
+        self.store.delete_sections(job_id, keys)
+        self._enqueue(job_id, keys, False)
+
+    def resume_unfinished(self):
+        """Queue the active jobs no live runner holds; returns their IDs."""
+        self.store.purge()
+        return [job_id for job_id in self.store.unfinished() if self._enqueue(job_id)]
+
+    def live_text(self, job_id):
+        with self._lock:
+            return dict(self._live.get(job_id, {}))
+
+    def _run(self, job_id, keys=None, notify=True):
+        # `keys`: only these missing sections (a regeneration); None sends every missing one
+        with self._lock:
+            self._queued.discard(job_id)
+        if not self.store.claim(job_id, self.owner):
+            return  # finished meanwhile, or another runner holds it
+        job = self.store.get(job_id)
+        current_session.set(job["session"])
+        try:
+            with run("analyze", job["session"]) as job_run:
+                scores = self._generate(job, keys)
+            job = self.store.get(job_id)
+            # fill the local fallback analysis and recommendations in once every prompt is done
+            sections = finalize_sections(job["sections"], job["resume"], job["jd"])
+            analysis_error = job["errors"].get("analysis")
+            if analysis_error is None and "analysis" not in job["sections"]:
+                analysis_error = PENDING_ANALYSIS  # the ATS prompt ran out of time
+            for key in ("analysis", "recommendations"):
+                if not job["sections"].get(key):
+                    self.store.save_section(job_id, key, sections[key], analysis_error if key == "analysis" else None)
+            self.store.update(job_id, "done", scores=scores, stages=job_run.rows())
+        except Exception as exc:
+            self.store.update(job_id, "failed", error=f"{type(exc).__name__}: {exc}")
+        finally:
+            with self._lock:
+                self._live.pop(job_id, None)
+        if self.on_done and notify:
+            self.on_done(self.store.get(job_id))
+
+    def _generate(self, job, keys=None):
+        job_id, rt, jd = job["id"], job["resume"], job["jd"]
+        # one JSON call only for a fresh job; whatever is missing later goes section by section
+        if job["mode"] == "structured" and not job["sections"] and not job["errors"]:
+            from structured import run_structured
+            call = self._calls.submit(contextvars.copy_context().run, run_structured, job["model"], rt, jd)
+            try:
+                result, error = call.result(timeout=max(0.0, job["queued_at"] + ANALYSIS_BUDGET - time.time()))
+            except FutureTimeout:
+                return None  # everything pending; the call finishes in the background
+            if result is not None:
+                for key, text in result.to_sections().items():
+                    self.store.save_section(job_id, key, text)
+                return result.scores()
+            # a failed JSON call: every section goes out as its own prompt in this same run
+            annotate(structured_error=error)
+
+        # after a restart only the sections that were never saved are sent again
+        prompts = {k: p for k, p in build_prompts(rt, jd).items()
+                   if k not in job["sections"] and k not in job["errors"] and (keys is None or k in keys)}
+        deadlines = section_deadlines(prompts, since=job["queued_at"])
+        if job["mode"] == "stream":
+            with self._lock:
+                live = self._live.setdefault(job_id, {})
+            for key, kind, payload in stream_fan_out(job["model"], prompts, job["max_concurrency"], deadlines):
+                if kind == "chunk":
+                    with self._lock:
+                        live[key] = live.get(key, "") + payload
+                    continue
+                if kind == "done":
+                    self.store.save_section(job_id, key, payload)
+                elif kind == "error":
+                    self.store.save_section(job_id, key, None, payload)
+                with self._lock:
+                    live.pop(key, None)
+        else:
+            def on_result(key, text, error):
+                self.store.save_section(job_id, key, text, error)
+            fan_out(job["model"], prompts, job["max_concurrency"], on_result, deadlines)
+        return None
+
+
+def job_progress(store, job_id):
+    # share of the LLM sections that have a saved result (or error)
+    status, keys = store.status(job_id)
+    return status, len(set(keys) & set(SECTION_LABELS)) / len(SECTION_LABELS)
@@ -0,0 +1,200 @@
+import math
+from collections import Counter
+from functools import lru_cache
+
+from instrumentation import stage
+from similarity import tokenize
+
+# canonical skill -> surface forms matched after stemming; ambiguous English
+# words ("go", "rest", "express") are only listed in unambiguous phrasings
+SKILLS = {
+    # languages
+    "Python": ["python", "python3"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "ecmascript", "es6"],
+    "TypeScript": ["typescript"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swiftui", "swift programming", "ios swift"],
+    "Scala": ["scala"],
+    "R": ["r programming", "rstudio"],
+    "SQL": ["sql"],
+    "Bash": ["bash", "shell scripting", "shell script"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3", "sass", "scss"],
+    # web & frameworks
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue": ["vue", "vue.js", "vuejs"],
+    "Node.js": ["node.js", "nodejs"],
+    "Express": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring boot", "springboot", "spring framework"],
+    "Laravel": ["laravel"],
+    ".NET": ["dotnet", "asp.net", "vb.net"],
+    "Ruby on Rails": ["rails", "ruby on rails"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["restful", "rest api", "rest apis", "restful api"],
+    "Microservices": ["microservice", "microservices"],
+    # data & ML
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "Keras": ["keras"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision"],
+    "LLMs": ["llm", "llms", "large language model", "generative ai", "genai"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Data Visualization": ["data visualization", "data visualisation"],
+    "Statistics": ["statistics", "statistical analysis"],
+    "Spark": ["spark", "pyspark", "apache spark"],
+    "Hadoop": ["hadoop"],
+    "Airflow": ["airflow", "apache airflow"],
+    "Kafka": ["kafka", "apache kafka"],
+    "ETL": ["etl", "elt", "data pipeline"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["microsoft excel", "ms excel", "excel spreadsheets"],
+    "Snowflake": ["snowflake"],
+    "dbt": ["dbt"],
+    # databases
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "DynamoDB": ["dynamodb"],
+    "Oracle": ["oracle db", "oracle database"],
+    "NoSQL": ["nosql"],
+    # cloud & devops
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker", "containerization", "containerized"],
+    "Kubernetes": ["kubernetes", "k8s", "eks", "gke", "aks"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "CI/CD": ["ci/cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "Git": ["git", "github", "gitlab", "version control"],
+    "Linux": ["linux", "unix"],
+    "Serverless": ["serverless", "lambda", "aws lambda", "cloud functions"],
+    "Monitoring": ["monitoring", "observability", "prometheus", "grafana", "datadog"],
+    # practices & soft skills
+    "Agile": ["agile", "scrum", "kanban"],
+    "Testing": ["unit testing", "test automation", "tdd", "pytest", "jest", "qa"],
+    "System Design": ["system design", "distributed systems", "scalability"],
+    "Security": ["security", "cybersecurity", "oauth", "owasp"],
+    "Project Management": ["project management", "jira"],
+    "Leadership": ["leadership", "mentoring", "mentor", "team lead"],
+    "Communication": ["communication", "presentation", "stakeholder management"],
+    "Problem Solving": ["problem solving", "problem-solving", "troubleshooting"],
+    "Collaboration": ["collaboration", "cross-functional", "teamwork"],
+}
+
+_SUFFIXES = ("ing", "ies", "es", "ed", "s")
+
+
+def stem(token: str) -> str:
+    # conservative suffix stripping; short and symbol-bearing tokens are left alone
+    if len(token) <= 4 or not token.isalpha():
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return token
+
+
+def _compile(skills):
+    # token-level trie: each node maps a stemmed token to a child; "$" marks a skill
+    root = {}
+    depth = 1
+    for canonical, forms in skills.items():
+        for form in forms:
+            tokens = [stem(t) for t in tokenize(form)]
+            if not tokens:
+                continue
+            node = root
+            for tok in tokens:
+                node = node.setdefault(tok, {})
+            node["$"] = canonical
+            depth = max(depth, len(tokens))
+    return root, depth
+
+
+_TRIE, _MAX_DEPTH = _compile(SKILLS)
+
+
+def find_skills(text: str) -> Counter:
+    """Count canonical skills mentioned in `text` with one left-to-right pass.
+
+    At every position the longest matching phrase wins and matching resumes
+    after it, so "spring boot" counts once as Spring rather than twice.
+    """
+    tokens = [stem(t) for t in tokenize(text)]
+    found = Counter()
+    i, n = 0, len(tokens)
+    while i < n:
+        node, match, end = _TRIE, None, i
+        for j in range(i, min(n, i + _MAX_DEPTH)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if "$" in node:
+                match, end = node["$"], j + 1
+        if match:
+            found[match] += 1
+            i = end
+        else:
+            i += 1
+    return found
+
+
+@lru_cache(maxsize=16)
+def jd_skills(jd_text: str) -> Counter:
+    # a JD is matched against many resumes in ranking and batch runs; don't mutate the result
+    return find_skills(jd_text)
+
+
+@lru_cache(maxsize=64)
+def keyword_report(resume_text: str, jd_text: str) -> dict:
+    """Deterministic keyword match of a resume against a JD's required skills.
+
+    The score weights each JD skill by 1 + log(mentions), so a skill the JD
+    repeats counts more than one it mentions in passing.
+    """
+    with stage("keywords"):
+        required = jd_skills(jd_text)
+        present = find_skills(resume_text)
+        weights = {skill: 1 + math.log(count) for skill, count in required.items()}
+        total = sum(weights.values())
+        matched = [s for s in required if s in present]
+        missing = sorted((s for s in required if s not in present), key=lambda s: -required[s])
+        score = 100 * sum(weights[s] for s in matched) / total if total else 0.0
+    return {"score": score, "required": list(required), "matched": matched, "missing": missing}
+
+
+def local_analysis(resume_text: str, jd_text: str) -> str:
+    # same bullet layout as the ATS prompt so get_val/extract_section keep working
+    report = keyword_report(resume_text, jd_text)
+    missing = ", ".join(report["missing"]) or "None"
+    return "\n".join([
+        f"- Job Description Match With Ats score: {report['score']:.0f}%",
+        f"- Missing Keywords: {missing}",
+        "- Profile Summary: Generated locally from keyword matching (LLM analysis unavailable).",
+        "- Personalized suggestions for skills, keywords and achievements that can enhance the provided resume:",
+        *(f"- Add evidence of {skill} experience" for skill in report["missing"][:5]),
+        f"- Skill Gap Percentage: {100 - report['score']:.0f}%",
+    ])
@@ -0,0 +1,416 @@
+import contextvars
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
+
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+import instrumentation
+from llm_cache import ResponseCache, cache_key
+from rate_limit import FairScheduler
+
+# Upper bound on in-flight Gemini requests per analysis
+DEFAULT_MAX_CONCURRENCY = 4
+# Process-wide budgets shared by every session (Gemma free tier)
+DEFAULT_RPM = 30
+DEFAULT_TPM = 15000
+MAX_ATTEMPTS = 5
+# how long a caller waits for an identical request already in flight
+INFLIGHT_WAIT = 120
+# per-attempt timeout handed to the SDK, so a stalled connection can't hold a worker forever
+CALL_TIMEOUT = 60
+# a call still running after the p95 latency of its stage gets a duplicate request;
+# hedging starts once a stage has this many samples
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 1.0
+LATENCY_WINDOW = 200
+
+# Set by the app once per script run; copied into worker threads by fan_out
+current_session = contextvars.ContextVar("current_session", default="default")
+
+
+@lru_cache(maxsize=None)
+def retryable_errors():
+    # google.api_core pulls in grpc; import it with the first call, not at startup
+    from google.api_core import exceptions as api_exceptions
+
+    return (
+        api_exceptions.ResourceExhausted,
+        api_exceptions.TooManyRequests,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.DeadlineExceeded,
+    )
+
+
+_api_key = None
+_genai = None
+_models = {}
+_models_lock = threading.Lock()
+scheduler = FairScheduler(DEFAULT_RPM, DEFAULT_TPM)
+
+_cache = None
+_cache_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+# runs the SDK calls themselves, so the caller can race a hedge against a slow one
+_calls = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-call")
+
+
+class LatencyTracker:
+    """Recent successful call latencies per (model, stage, streaming)."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, key):
+        # None until there are enough samples to trust
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+latencies = LatencyTracker()
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+    return _cache
+
+
+def set_cache(cache):
+    # swap the process-wide cache (None disables it) — used by tools and tests
+    global _cache
+    _cache = cache if cache is not None else False
+
+
+def configure_limits(rpm=DEFAULT_RPM, tpm=DEFAULT_TPM):
+    global scheduler
+    scheduler = FairScheduler(rpm, tpm)
+
+
+def set_api_key(api_key):
+    # stored only; the SDK is imported and configured by the first get_model()
+    global _api_key, _genai
+    with _models_lock:
+        if api_key == _api_key:
+            return
+        _api_key, _genai = api_key, None
+        _models.clear()
+
+
+def get_model(model_name: str):
+    # one GenerativeModel per name for the whole process; they share genai's client
+    global _genai
+    with _models_lock:
+        if _genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=_api_key)
+            _genai = genai
+        if model_name not in _models:
+            _models[model_name] = _genai.GenerativeModel(model_name)
+        return _models[model_name]
+
+
+def estimate_tokens(text: str) -> int:
+    # Gemini/Gemma tokenizers average roughly four characters per token on English text
+    return (len(text) + 3) // 4
+
+
+def _retrying():
+    return Retrying(
+        retry=retry_if_exception_type(retryable_errors()),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True,
+    )
+
+
+def _hedged(model_name, prompt, send, stream=False):
+    """Return `send()`, racing a second `send()` against it once it outlives its stage's p95.
+
+    Whichever answers first wins; a failure only counts once both have failed.
+    The loser is left to finish on its own.
+    """
+    key = (model_name, instrumentation.current_stage_name(), stream)
+    delay = latencies.p95(key)
+    started = time.perf_counter()
+    futures = [_calls.submit(send)]
+    if delay is not None:
+        done, _ = wait(futures, timeout=max(delay, HEDGE_MIN_DELAY))
+        if not done:
+            # the duplicate is a real request and counts against the rate limits
+            scheduler.acquire(current_session.get(), estimate_tokens(prompt))
+            futures.append(_calls.submit(send))
+            instrumentation.annotate(hedged=True)
+    error = None
+    for future in as_completed(futures):
+        try:
+            result = future.result()
+        except Exception as exc:
+            error = exc
+            continue
+        latencies.record(key, time.perf_counter() - started)
+        if len(futures) > 1:
+            instrumentation.annotate(hedge_won=future is futures[1])
+        return result
+    raise error
+
+
+def _call_model(model_name, prompt):
+    model = get_model(model_name)
+    send = lambda: model.generate_content(prompt, request_options={"timeout": CALL_TIMEOUT})
+    for attempt in _retrying():
+        with attempt:
+            scheduler.acquire(current_session.get(), estimate_tokens(prompt))
+            resp = _hedged(model_name, prompt, send)
+            text = resp.text.strip()
+    usage = getattr(resp, "usage_metadata", None)
+    tokens_in = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt)
+    tokens_out = getattr(usage, "candidates_token_count", 0) or estimate_tokens(text)
+    instrumentation.annotate(tokens_in=tokens_in, tokens_out=tokens_out,
+                             attempts=attempt.retry_state.attempt_number)
+    scheduler.record(tokens_out)
+    return text
+
+
+def _open_stream(model_name, prompt):
+    # rate-limit errors surface on the first chunk, so that is what gets retried (and hedged)
+    model = get_model(model_name)
+
+    def send():
+        chunks = iter(model.generate_content(prompt, stream=True, request_options={"timeout": CALL_TIMEOUT}))
+        return next(chunks, None), chunks
+
+    for attempt in _retrying():
+        with attempt:
+            scheduler.acquire(current_session.get(), estimate_tokens(prompt))
+            first, chunks = _hedged(model_name, prompt, send, stream=True)
+    return first, chunks
+
+
+def _join_timeout(model_name, started, stream):
+    # a joined caller waits only until the owner's call passes its stage's p95, then sends
+    # its own request like a hedge; a stalled owner doesn't stall everyone behind it
+    p95 = latencies.p95((model_name, instrumentation.current_stage_name(), stream))
+    if p95 is None:
+        return INFLIGHT_WAIT
+    return max(0.0, started + max(p95, HEDGE_MIN_DELAY) - time.perf_counter())
+
+
+def _claim(model_name, prompt, stream=False):
+    # first caller for a prompt owns the API call; later ones get the owner's event to wait on
+    # and how long to wait for it
+    key = cache_key(model_name, prompt)
+    with _inflight_lock:
+        if key in _inflight:
+            event, started = _inflight[key]
+            return key, event, False, _join_timeout(model_name, started, stream)
+        event = threading.Event()
+        _inflight[key] = (event, time.perf_counter())
+        return key, event, True, None
+
+
+def _release(key, event):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    event.set()
+
+
+def _cached(cache, model_name, prompt, joined=False):
+    hit = cache.get(model_name, prompt)
+    if hit is not None:
+        instrumentation.annotate(cache_hit=True, response_chars=len(hit), **({"joined": True} if joined else {}))
+    return hit
+
+
+def generate(model_name: str, prompt: str) -> str:
+    """Generate (or fetch from the cache) the response to one prompt.
+
+    With the cache on, identical prompts in flight at the same time (e.g. a
+    prefetch and the analysis that needs it) share one API call.
+    """
+    cache = get_cache()
+    instrumentation.annotate(prompt_chars=len(prompt), cache_hit=False)
+    if not cache:
+        text = _call_model(model_name, prompt)
+        instrumentation.annotate(response_chars=len(text))
+        return text
+    hit = _cached(cache, model_name, prompt)
+    if hit is not None:
+        return hit
+    key, event, owner, timeout = _claim(model_name, prompt)
+    if not owner:
+        event.wait(timeout)
+        hit = _cached(cache, model_name, prompt, joined=True)
+        if hit is not None:
+            return hit
+    try:
+        text = _call_model(model_name, prompt)
+        instrumentation.annotate(response_chars=len(text))
+        cache.put(model_name, prompt, text)
+    finally:
+        if owner:
+            _release(key, event)
+    return text
+
+
+def generate_stream(model_name: str, prompt: str):
+    """Yield the response text in chunks as the model produces them.
+
+    A cache hit is yielded as a single chunk; the full response is cached
+    once the stream completes. Like `generate`, it waits for an identical
+    request already in flight instead of sending a second one.
+    """
+    cache = get_cache()
+    instrumentation.annotate(prompt_chars=len(prompt), cache_hit=False)
+    key = event = None
+    if cache:
+        hit = _cached(cache, model_name, prompt)
+        if hit is not None:
+            yield hit
+            return
+        key, event, owner, timeout = _claim(model_name, prompt, stream=True)
+        if not owner:
+            event.wait(timeout)
+            hit = _cached(cache, model_name, prompt, joined=True)
+            if hit is not None:
+                yield hit
+                return
+            key = event = None
+    try:
+        first, chunks = _open_stream(model_name, prompt)
+        parts = []
+        if first is not None:
+            for chunk in itertools.chain([first], chunks):
+                parts.append(chunk.text)
+                yield chunk.text
+        text = "".join(parts).strip()
+        instrumentation.annotate(response_chars=len(text), tokens_in=estimate_tokens(prompt),
+                                 tokens_out=estimate_tokens(text))
+        scheduler.record(estimate_tokens(text))
+        if cache:
+            cache.put(model_name, prompt, text)
+    finally:
+        if event is not None:
+            _release(key, event)
+
+
+def _error_text(exc):
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _timed_generate(key, model_name, prompt):
+    with instrumentation.stage(f"llm:{key}", model=model_name):
+        return generate(model_name, prompt)
+
+
+def _next_deadline(deadlines, keys):
+    # seconds until the earliest deadline among `keys`, or None for no deadline
+    due = [deadlines[k] for k in keys if k in deadlines] if deadlines else []
+    return max(0.0, min(due) - time.monotonic()) if due else None
+
+
+def fan_out(model_name, prompts, max_concurrency=DEFAULT_MAX_CONCURRENCY, on_result=None, deadlines=None):
+    """Run independent prompts in parallel on a bounded thread pool.
+
+    `prompts` maps a section key to its prompt. Returns `(results, errors)`,
+    two dicts keyed by section; a failing call only lands in `errors` and
+    never cancels its siblings. `on_result(key, text, error)` is invoked from
+    the calling thread as each call finishes, so it may touch Streamlit.
+
+    `deadlines` maps keys to a `time.monotonic()` time. A section still
+    running then is in neither dict (it is pending); its call carries on in
+    the background and a late response still lands in the cache.
+    """
+    results, errors = {}, {}
+    workers = max(1, min(max_concurrency, len(prompts)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+    try:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _timed_generate, key, model_name, p): key
+            for key, p in prompts.items()
+        }
+        running = set(futures)
+        while running:
+            done, running = wait(running, timeout=_next_deadline(deadlines, map(futures.get, running)),
+                                 return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = futures[fut]
+                try:
+                    results[key] = fut.result()
+                except Exception as exc:
+                    errors[key] = _error_text(exc)
+                if on_result:
+                    on_result(key, results.get(key), errors.get(key))
+            if deadlines:
+                now = time.monotonic()
+                running = {f for f in running if deadlines.get(futures[f], now + 1) > now}
+    finally:
+        # don't wait for calls past their deadline; ones that never started are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results, errors
+
+
+def stream_fan_out(model_name, prompts, max_concurrency=DEFAULT_MAX_CONCURRENCY, deadlines=None):
+    """Streaming variant of `fan_out`.
+
+    Yields `(key, kind, payload)` events in arrival order on the calling
+    thread: `("chunk", text)` for each streamed piece, then exactly one of
+    `("done", full_text)`, `("error", message)` or, once its deadline has
+    passed, `("pending", None)` per section.
+    """
+    events = queue.Queue()
+    started = time.perf_counter()
+
+    def work(key, prompt):
+        parts = []
+        try:
+            with instrumentation.stage(f"llm:{key}", model=model_name, stream=True) as record:
+                for chunk in generate_stream(model_name, prompt):
+                    if not parts:
+                        record["first_chunk_seconds"] = round(time.perf_counter() - started, 6)
+                    parts.append(chunk)
+                    events.put((key, "chunk", chunk))
+            events.put((key, "done", "".join(parts).strip()))
+        except Exception as exc:
+            events.put((key, "error", _error_text(exc)))
+
+    workers = max(1, min(max_concurrency, len(prompts)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-stream")
+    try:
+        for key, prompt in prompts.items():
+            pool.submit(contextvars.copy_context().run, work, key, prompt)
+        running = set(prompts)
+        while running:
+            try:
+                event = events.get(timeout=_next_deadline(deadlines, running))
+            except queue.Empty:
+                now = time.monotonic()
+                for key in [k for k in running if deadlines.get(k, now + 1) <= now]:
+                    running.discard(key)
+                    yield key, "pending", None
+                continue
+            if event[0] not in running:
+                continue  # a section already given up on
+            if event[1] != "chunk":
+                running.discard(event[0])
+            yield event
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    model       TEXT NOT NULL,
+    body        BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def normalize_prompt(prompt: str) -> str:
+    # line endings and trailing spaces never change what the model sees
+    prompt = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    prompt = re.sub(r"[ \t]+\n", "\n", prompt)
+    return prompt.strip()
+
+
+def cache_key(model_name: str, prompt: str) -> str:
+    payload = f"{model_name}\x00{normalize_prompt(prompt)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache keyed by (model, normalized prompt).
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the stored (compressed) bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO stats(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, model_name, prompt):
+        key, now = cache_key(model_name, prompt), time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._bump(conn, "hits")
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, model_name, prompt, text):
+        key, now = cache_key(model_name, prompt), time.time()
+        body = zlib.compress(text.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses(key, model, body, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, body, len(body), now, now),
+            )
+            self._evict(conn, now)
+
+    def delete(self, model_name, prompt):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (cache_key(model_name, prompt),))
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._bump(conn, "evictions")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM stats")
@@ -0,0 +1,172 @@
+import time
+
+from compaction import PROMPT_TOKEN_BUDGET, compact_jd, compact_pair
+from instrumentation import stage
+from keywords import keyword_report, local_analysis
+from llm import DEFAULT_MAX_CONCURRENCY, estimate_tokens, fan_out
+from similarity import similarity_scores
+
+# 1) Extract section helper
+def extract_section(full, header):
+    lines, out, cap = full.splitlines(), [], False
+    key = header.lower()
+    for ln in lines:
+        txt = ln.lstrip("- ").strip()
+        if cap:
+            if txt.lower().startswith("- "):
+                break
+            out.append(txt)
+        elif txt.lower().startswith(key):
+            cap = True
+    return "\n".join(out).strip()
+
+# 2) Prompt builders — every section is independent, so they can run in parallel
+SECTION_LABELS = {
+    "analysis": "ATS analysis",
+    "tailored": "Tailored resume",
+    "cover_letter": "Cover letter",
+    "interview_qs": "Interview questions",
+    "skill_gap": "Skill gap analysis",
+    "related_roles": "Related roles",
+    "salary_estimate": "Salary estimate",
+    "networking_tips": "Networking tips",
+}
+
+# seconds from the start of an analysis that it waits for each section, and for all of them;
+# sections still running then are left pending and can be regenerated one by one
+DEFAULT_SECTION_DEADLINE = 60
+SECTION_DEADLINES = {"tailored": 90}
+ANALYSIS_BUDGET = 100
+
+def section_deadlines(keys, budget=ANALYSIS_BUDGET, since=None):
+    # time.monotonic() deadlines for llm.fan_out / stream_fan_out, counted from `since`
+    # (a time.time() stamp, e.g. when a job was queued) or from now
+    start = time.monotonic() - (max(0.0, time.time() - since) if since is not None else 0.0)
+    return {key: start + min(SECTION_DEADLINES.get(key, DEFAULT_SECTION_DEADLINE), budget) for key in keys}
+
+# prompts that only see the JD, so they can start before a resume is uploaded
+JD_ONLY_KEYS = ("cover_letter", "interview_qs", "skill_gap", "salary_estimate", "networking_tips")
+
+def jd_prompts(jd, budget=PROMPT_TOKEN_BUDGET):
+    # the same text build_prompts() produces for these keys, whatever the resume
+    only_jd = jd if budget is None else compact_jd(jd, budget)
+    prompts = _section_prompts("", "", only_jd)
+    return {key: prompts[key] for key in JD_ONLY_KEYS}
+
+def build_prompts(rt, jd, budget=PROMPT_TOKEN_BUDGET):
+    """Section prompts for one pair, with inputs compacted to `budget` tokens.
+
+    `budget=None` sends the texts as given. Token estimates before and after
+    compaction are recorded per prompt on the "compaction" stage.
+    """
+    with stage("compaction") as record:
+        prompts = section_prompts(rt, jd, budget)
+        if budget is not None:
+            raw = _section_prompts(rt, jd, jd)
+            record["prompts"] = {k: [estimate_tokens(raw[k]), estimate_tokens(p)] for k, p in prompts.items()}
+            record["tokens_before"] = sum(before for before, _ in record["prompts"].values())
+            record["tokens_after"] = sum(after for _, after in record["prompts"].values())
+    return prompts
+
+def section_prompts(rt, jd, budget=PROMPT_TOKEN_BUDGET):
+    # build_prompts() without recording a "compaction" stage
+    if budget is None:
+        return _section_prompts(rt, jd, jd)
+    pair_rt, pair_jd = compact_pair(rt, jd, budget)
+    return _section_prompts(pair_rt, pair_jd, compact_jd(jd, budget))
+
+def _section_prompts(rt, jd, only_jd):
+    ats_prompt = f"""
+You are an ATS. Respond in bullets:
+- Job Description Match With Ats score:
+- Missing Keywords:
+- Profile Summary:
+- Personalized suggestions for skills, keywords and achievements that can enhance the provided resume:
+- Application Success Rate:
+- Skill Gap Percentage:
+- Suggest 3 related job titles based on the following:
+Resume:
+{rt}
+JD:
+{jd}
+"""
+    tailor_prompt = f"""
+You are a professional resume writer with 10+ years experience. Using the ORIGINAL resume and JD, write a fully tailored resume:
+ORIGINAL:
+{rt}
+JD:
+{jd}
+Output only the resume.
+"""
+    return {
+        "analysis": ats_prompt,
+        "tailored": tailor_prompt,
+        "cover_letter": f"Write a one-page cover letter for JD:\n{only_jd}",
+        "interview_qs": f"List 5 likely interview questions for JD:\n{only_jd}",
+        "skill_gap": f"Compare skills to JD requirements; give Skill Gap Percentage with bullet points and calculate skill gap and no results in table maybe bulletpoints:\n{only_jd}",
+        "related_roles": f"Suggest 3 related job titles. By the JD and Resume you generated:\n{jd}{rt}",
+        "salary_estimate": f"Estimate salary range in USD for JD:\n{only_jd}",
+        "networking_tips": f"Provide 3 networking tips for this JD:\n{only_jd}",
+    }
+
+# 3) Score parsing
+def get_val(analysis, key):
+    for ln in analysis.splitlines():
+        t = ln.lstrip("- ").strip()
+        if t.lower().startswith(key.lower()):
+            num = "".join(ch for ch in t.split(":",1)[1] if ch.isdigit() or ch==".")
+            try: return float(num)
+            except: pass
+    return None
+
+def compute_metrics(analysis, resume_text, jd_text, scores=None):
+    # `scores` (label -> value) comes from a structured result and skips text parsing
+    val = scores.get if scores is not None else (lambda key: get_val(analysis, key))
+    m = val("Job Description Match")
+    s = val("Application Success Rate")
+    g = val("Skill Gap Percentage")
+    # both are memoized; they record a stage only when they actually compute
+    sim = similarity_scores(resume_text, jd_text)
+    kw = keyword_report(resume_text, jd_text)
+
+    metrics = []
+    if m is not None: metrics.append(("Job Match %", f"{m:.1f}%"))
+    if s is not None: metrics.append(("Success Rate %", f"{s:.1f}%"))
+    if g is not None: metrics.append(("Skill Gap %", f"{g:.1f}%"))
+    metrics.append(("Text Similarity %", f"{sim['tfidf']:.1f}%"))
+    metrics.append(("N-gram Similarity %", f"{sim['ngram']:.1f}%"))
+    metrics.append(("Keyword Coverage %", f"{sim['coverage']:.1f}%"))
+    metrics.append(("Keyword Match % (local)", f"{kw['score']:.1f}%"))
+    metrics.append(("Missing Keywords (local)", ", ".join(kw["missing"]) or "None"))
+    return metrics
+
+# 4) End-to-end analysis of one resume/JD pair
+REPORT_SECTION_KEYS = [
+    "recommendations", "tailored", "cover_letter", "interview_qs", "skill_gap",
+    "related_roles", "salary_estimate", "networking_tips",
+]
+
+def report_sections(sections):
+    # positional section arguments of generate_structured_pdf/docx
+    recs = sections.get("recommendations") or sections.get("analysis", "")
+    return (recs, *(sections.get(k, "") for k in REPORT_SECTION_KEYS[1:]))
+
+def run_analysis(model_name, rt, jd, keys=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, on_result=None):
+    """Run the section prompts for one pair; returns `(sections, errors)`.
+
+    `keys` limits which prompts are sent (all of them by default). When the
+    ATS call fails or is skipped, `analysis` falls back to the local keyword
+    engine so scores and recommendations are always available.
+    """
+    prompts = build_prompts(rt, jd)
+    if keys is not None:
+        prompts = {k: p for k, p in prompts.items() if k in keys}
+    results, errors = fan_out(model_name, prompts, max_concurrency, on_result)
+    return finalize_sections(results, rt, jd), errors
+
+def finalize_sections(results, rt, jd):
+    sections = {key: results.get(key, "") for key in SECTION_LABELS}
+    if not sections["analysis"]:
+        sections["analysis"] = local_analysis(rt, jd)
+    sections["recommendations"] = extract_section(sections["analysis"], "personalized suggestions")
+    return sections
@@ -0,0 +1,123 @@
+"""Speculative prefetch of the JD-only section prompts.
+
+The cover letter, interview questions, skill gap, salary and networking
+prompts depend only on the job description. As soon as a JD is entered
+they are generated in the background, so by the time the analysis runs
+their responses are in the LLM response cache, or still in flight and
+joined by `llm.generate`. Only the resume-dependent prompts are then left
+on the critical path. Each session has at most one prefetch, keyed by a
+hash of model and JD; a different JD or model cancels it. Requests that
+were already sent finish and are cached, the rest are never sent.
+"""
+import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import stage
+from llm import current_session, generate, get_cache
+from llm_cache import cache_key
+from pipeline import jd_prompts
+from session_memory import SessionRegistry
+
+PREFETCH_WORKERS = 2
+# shorter text is most likely a JD still being pasted or typed
+PREFETCH_MIN_CHARS = 200
+# a finished prefetch only remembers its key, so the same JD isn't fetched again on the next rerun
+PREFETCH_TTL = 600
+
+
+class Prefetch:
+    def __init__(self, key, total):
+        self.key = key
+        self.total = total
+        self.finished = 0
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def finish_one(self):
+        with self._lock:
+            self.finished += 1
+
+    def progress(self):
+        # (finished, total)
+        with self._lock:
+            return self.finished, self.total
+
+
+class Prefetcher:
+    """Runs prefetches on a small shared pool, sessions taking turns.
+
+    Each session queues at most the prompts of its current prefetch, and the
+    pool's workers take the next prompt round-robin across sessions, so one
+    user pasting JD after JD cannot push everyone else's prefetch back.
+    Responses go to the LLM response cache only; a prefetch holds no text.
+    """
+
+    def __init__(self, max_workers=PREFETCH_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._by_session = SessionRegistry(ttl=PREFETCH_TTL, on_evict=Prefetch.cancel)
+        # session -> deque of (prefetch, model, section, prompt) not yet sent
+        self._queues = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, session, model_name, jd):
+        """Prefetch the JD-only prompts for `jd` unless already doing so; returns the Prefetch or None."""
+        if len(jd.strip()) < PREFETCH_MIN_CHARS or not get_cache():
+            self.cancel(session)
+            return None
+        key = cache_key(model_name, jd)
+        current = self._by_session.get(session)
+        if current is not None and current.key == key:
+            return current
+        prompts = jd_prompts(jd)
+        prefetch = Prefetch(key, len(prompts))
+        with self._lock:
+            # replaces the previous JD's prompts that were not sent yet
+            self._queues.pop(session, None)
+            self._queues[session] = deque((prefetch, model_name, section, prompt)
+                                          for section, prompt in prompts.items())
+        self._by_session.put(session, prefetch)
+        for _ in prompts:
+            self._pool.submit(self._next)
+        return prefetch
+
+    def cancel(self, session):
+        with self._lock:
+            self._queues.pop(session, None)
+        prefetch = self._by_session.pop(session)
+        if prefetch is not None:
+            prefetch.cancel()
+
+    def memory_usage(self):
+        # a prefetch holds no text; its prompts do until they are sent
+        with self._lock:
+            return {session: sum(sys.getsizeof(prompt) for *_, prompt in queue)
+                    for session, queue in self._queues.items()}
+
+    def _next(self):
+        # one prompt from the session at the head, which then goes to the back
+        with self._lock:
+            if not self._queues:
+                return
+            session, queue = next(iter(self._queues.items()))
+            prefetch, model_name, section, prompt = queue.popleft()
+            if queue:
+                self._queues.move_to_end(session)
+            else:
+                del self._queues[session]
+        try:
+            if not prefetch.cancelled.is_set():
+                self._fetch(session, model_name, section, prompt)
+        except Exception:
+            pass  # speculative: the analysis sends the prompt again and reports the error
+        finally:
+            prefetch.finish_one()
+
+    def _fetch(self, session, model_name, section, prompt):
+        current_session.set(session)
+        with stage(f"prefetch:{section}", model=model_name):
+            generate(model_name, prompt)
@@ -0,0 +1,121 @@
+"""Rank several resumes against one job description.
+
+Every resume is extracted, scored locally (similarity and keyword match)
+and sent through the ATS prompt only, in parallel. The JD side is shared:
+its tokens and skills are computed once (`similarity._prepare`,
+`keywords.jd_skills`) and its JD-only prompts come from the session's
+prefetch. Full tailoring is left for the one resume the user picks, and
+that run finds the resume's ATS analysis already in the response cache.
+"""
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from extraction import ExtractionError, extract_text
+from instrumentation import stage
+from keywords import keyword_report, local_analysis
+from llm import DEFAULT_MAX_CONCURRENCY, current_session, generate
+from pipeline import build_prompts, get_val
+from session_memory import SessionRegistry
+from similarity import similarity_scores
+
+MAX_RESUMES = 20
+# leaderboard column order
+COLUMNS = ["Resume", "Match %", "Skill Gap %", "Keyword Match %", "Text Similarity %", "N-gram Similarity %",
+           "Keyword Coverage %", "Status"]
+
+
+class Ranking:
+    def __init__(self, jd, model_name, names):
+        self.id = uuid.uuid4().hex[:12]
+        self.jd = jd
+        self.model = model_name
+        self.futures = []
+        self._lock = threading.Lock()
+        self._rows = {name: {"Resume": name, "Status": "queued"} for name in names}
+        self._texts = {}
+
+    def update(self, name, text=None, **fields):
+        with self._lock:
+            self._rows[name].update(fields)
+            if text is not None:
+                self._texts[name] = text
+
+    def rows(self):
+        # best match first; unscored resumes last
+        with self._lock:
+            rows = [dict(r) for r in self._rows.values()]
+        return sorted(rows, key=lambda r: -(r.get("Match %") if r.get("Match %") is not None else -1))
+
+    def resume_text(self, name):
+        with self._lock:
+            return self._texts.get(name)
+
+    def done(self):
+        return all(f.done() for f in self.futures)
+
+    def memory_bytes(self):
+        # the resume texts dominate; rows are a few numbers each
+        with self._lock:
+            return sys.getsizeof(self.jd) + sum(sys.getsizeof(text) for text in self._texts.values())
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+
+class Ranker:
+    def __init__(self, max_workers=DEFAULT_MAX_CONCURRENCY):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rank")
+        # a ranking keeps every resume's text for "Run full tailoring"; idle ones expire
+        self._by_session = SessionRegistry(on_evict=Ranking.cancel)
+
+    def start(self, session, model_name, jd, files):
+        """Score `files` ([(name, pdf bytes), ...]) against `jd`; replaces the session's last ranking."""
+        named, seen = [], {}
+        for name, data in files[:MAX_RESUMES]:
+            # two uploads may share a file name; each still needs its own row
+            seen[name] = seen.get(name, 0) + 1
+            named.append((name if seen[name] == 1 else f"{name} ({seen[name]})", data))
+        ranking = Ranking(jd, model_name, [name for name, _ in named])
+        self._by_session.put(session, ranking)
+        ranking.futures = [self._pool.submit(self._score, ranking, session, name, data) for name, data in named]
+        return ranking
+
+    def get(self, session):
+        return self._by_session.get(session)
+
+    def memory_usage(self):
+        return self._by_session.memory_usage()
+
+    def _score(self, ranking, session, name, data):
+        current_session.set(session)
+        ranking.update(name, Status="extracting")
+        try:
+            with stage("extraction", bytes=len(data)):
+                rt = extract_text(data)
+        except ExtractionError as exc:
+            ranking.update(name, Status=f"failed: {exc}")
+            return
+        kw = keyword_report(rt, ranking.jd)
+        sim = similarity_scores(rt, ranking.jd)
+        ranking.update(
+            name, rt, Status="analyzing", **{
+                "Keyword Match %": round(kw["score"], 1),
+                "Text Similarity %": round(sim["tfidf"], 1),
+                "N-gram Similarity %": round(sim["ngram"], 1),
+                "Keyword Coverage %": round(sim["coverage"], 1),
+            })
+        status = "done"
+        try:
+            # only the ATS prompt: its result is cached for a later full run on this resume
+            with stage("llm:analysis", model=ranking.model):
+                analysis = generate(ranking.model, build_prompts(rt, ranking.jd)["analysis"])
+        except Exception as exc:
+            analysis, status = local_analysis(rt, ranking.jd), f"local scores ({type(exc).__name__})"
+        ranking.update(
+            name, Status=status, **{
+                "Match %": get_val(analysis, "Job Description Match"),
+                "Skill Gap %": get_val(analysis, "Skill Gap Percentage"),
+            })
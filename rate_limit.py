@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class TokenBucket:
+    """Classic token bucket; `capacity` tokens refilled evenly over a minute.
+
+    Not thread-safe on its own — FairScheduler guards it with its condition.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # seconds until `amount` is available; oversize requests only need a full bucket
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        # may go negative when actual usage turns out larger than reserved
+        self.level -= amount
+
+
+class FairScheduler:
+    """Admit LLM requests under RPM and TPM budgets, round-robin across sessions.
+
+    Each session waits in its own FIFO; sessions take turns, so one user
+    with a long queue of prompts cannot starve another user's single call.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()
+
+    def acquire(self, session, tokens):
+        ticket = object()
+        with self._cond:
+            self._queues.setdefault(session, deque()).append(ticket)
+            try:
+                while True:
+                    head_session = next(iter(self._queues))
+                    if head_session == session and self._queues[session][0] is ticket:
+                        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            return
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._remove(session, ticket)
+
+    def _remove(self, session, ticket):
+        # granted (or abandoned): the session goes to the back of the line
+        queue = self._queues[session]
+        queue.remove(ticket)
+        if queue:
+            self._queues.move_to_end(session)
+        else:
+            del self._queues[session]
+        self._cond.notify_all()
+
+    def record(self, tokens):
+        # charge tokens only known after the call (the response)
+        with self._cond:
+            self.tokens.take(tokens)
+
+    def waiting(self):
+        with self._cond:
+            return {session: len(q) for session, q in self._queues.items()}
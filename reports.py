@@ -0,0 +1,77 @@
+from docmodel import layout, parse, to_latin1
+
+# Report sections in the positional order of generate_structured_pdf/docx,
+# with the list style each one is rendered in
+REPORT_SECTIONS = [
+    ("Recommendations", "bullet"),
+    ("AI-Tailored Resume", "text"),
+    ("Cover Letter", "text"),
+    ("Interview Prep Questions", "numbered"),
+    ("Skill Gap Analysis", "text"),
+    ("Related Roles", "bullet"),
+    ("Salary Estimate", "text"),
+    ("Networking Tips", "bullet"),
+]
+
+# 1) Simple PDF for quick dumps
+def generate_pdf_simple(text: str) -> bytes:
+    from fpdf import FPDF
+
+    pdf_obj = FPDF()
+    pdf_obj.add_page()
+    pdf_obj.set_auto_page_break(True, 15)
+    pdf_obj.set_font("Arial", size=12)
+
+    for _, prefix, line in layout(parse(to_latin1(text))):
+        pdf_obj.multi_cell(0, 8, to_latin1(prefix) + line)
+    return pdf_obj.output(dest="S").encode("latin-1")
+
+
+# 2) Structured DOCX
+def generate_structured_docx(metrics, *sections):
+    # filled into the process-wide report skeleton, see docx_template.py
+    from docx_template import get_template
+
+    specs = ((title, style, body) for (title, style), body in zip(REPORT_SECTIONS, sections))
+    return get_template().render(metrics, specs)
+
+# 3) Structured PDF
+def generate_structured_pdf(metrics, *sections):
+    from fpdf import FPDF
+
+    pdf_obj = FPDF()
+    pdf_obj.add_page()
+    pdf_obj.set_font("Arial", "B", 16)
+    pdf_obj.cell(0, 10, "PathPinpoint Full Report", ln=True, align="C")
+    pdf_obj.ln(5)
+
+    # effective page width
+    epw = pdf_obj.w - 2 * pdf_obj.l_margin
+    col_w = epw / 2
+
+    # Scores table
+    pdf_obj.set_font("Arial", "B", 14)
+    pdf_obj.cell(0, 8, "ATS & Similarity Scores", ln=True)
+    pdf_obj.set_font("Arial", "", 12)
+    pdf_obj.cell(col_w, 8, "Metric", border=1)
+    pdf_obj.cell(col_w, 8, "Value", border=1, ln=True)
+    for label, value in metrics:
+        pdf_obj.cell(col_w, 8, to_latin1(label), border=1)
+        pdf_obj.cell(col_w, 8, to_latin1(value), border=1, ln=True)
+    pdf_obj.ln(5)
+
+    for (title, style), body in zip(REPORT_SECTIONS, sections):
+        pdf_obj.set_font("Arial", "B", 14)
+        pdf_obj.cell(0, 8, title, ln=True)
+        pdf_obj.set_font("Arial", "", 12)
+        # normalize the whole section once; only the short list prefixes remain
+        for kind, prefix, text in layout(parse(to_latin1(body)), style):
+            if kind == "heading":
+                pdf_obj.set_font("Arial", "B", 12)
+                pdf_obj.multi_cell(0, 6, text)
+                pdf_obj.set_font("Arial", "", 12)
+            else:
+                pdf_obj.multi_cell(0, 6, to_latin1(prefix) + text)
+        pdf_obj.ln(3)
+
+    return pdf_obj.output(dest="S").encode("latin-1")
@@ -0,0 +1,37 @@
+"""Signed, expiring session links for the `?sid=` query parameter.
+
+The session ID keys a session's history, and the URL is what brings a
+reloaded page back to it, so the URL carries a token instead of the bare
+ID: `<session>.<expires>.<signature>`. Tokens cannot be made up or
+extended without the server's secret, and a link found later in browser
+history or a shared message stops working after `LINK_TTL`. A valid link
+only reopens the History table; the app never reattaches a session's jobs,
+resume or generated documents from a link.
+"""
+import hashlib
+import hmac
+import time
+
+# a reload within this long comes back to the same session; every page load issues a fresh link
+LINK_TTL = 7 * 24 * 3600
+
+
+def _signature(secret, payload):
+    return hmac.new(secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+
+def sign(session, secret, ttl=LINK_TTL):
+    payload = f"{session}.{int(time.time() + ttl)}"
+    return f"{payload}.{_signature(secret, payload)}"
+
+
+def verify(token, secret):
+    """The session ID of a valid, unexpired token, else None."""
+    try:
+        session, expires, signature = (token or "").split(".")
+        expired = int(expires) < time.time()
+    except ValueError:
+        return None
+    if expired or not hmac.compare_digest(signature, _signature(secret, f"{session}.{expires}")):
+        return None
+    return session
@@ -0,0 +1,327 @@
+"""Per-session texts and artifacts with a bounded in-memory footprint.
+
+A session's resume, JD, generated sections and rendered downloads live in
+its `SessionData` instead of `st.session_state`. Values of at least
+`SPILL_MIN_BYTES` go straight to a zlib-compressed SQLite store, and
+smaller ones follow once they have not been read for `IDLE_SPILL_SECONDS`.
+Reading a spilled value loads it back, so callers never see the
+difference. `SessionMemory` tracks every session in the process, sweeps
+idle values out from whichever script run comes along, and reports the
+bytes each session holds in memory and on disk.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_SPILL_PATH = os.path.join(".cache", "session_spill.sqlite3")
+# about 8 pages of text; rendered PDFs and DOCX files are always larger
+SPILL_MIN_BYTES = 16 * 1024
+IDLE_SPILL_SECONDS = 300
+SWEEP_INTERVAL = 30
+# a session nobody has touched for this long is forgotten; its analyses stay in the history store
+SESSION_TTL = 24 * 3600
+# a session's background task (ranking, prefetch, export) is dropped this long after it was last looked at
+TASK_TTL = 3600
+MAX_TASK_SESSIONS = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spilled (
+    session   TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    is_bytes  INTEGER NOT NULL,
+    data      BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (session, key)
+);
+CREATE INDEX IF NOT EXISTS spilled_time ON spilled(stored_at);
+"""
+
+
+class SpillStore:
+    def __init__(self, path=DEFAULT_SPILL_PATH, ttl=SESSION_TTL):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # rows of sessions a previous process was holding
+            conn.execute("DELETE FROM spilled WHERE stored_at < ?", (time.time() - ttl,))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, session, key, value):
+        # returns the compressed size
+        is_bytes = isinstance(value, bytes)
+        blob = zlib.compress(value if is_bytes else value.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO spilled(session, key, is_bytes, data, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (session, key, int(is_bytes), blob, time.time()),
+            )
+        return len(blob)
+
+    def get(self, session, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT is_bytes, data FROM spilled WHERE session = ? AND key = ?",
+                               (session, key)).fetchone()
+        if row is None:
+            return None
+        data = zlib.decompress(row[1])
+        return data if row[0] else data.decode("utf-8")
+
+    def delete(self, session, keys=None):
+        # `keys=None` drops the whole session
+        with self._lock, self._connect() as conn:
+            if keys is None:
+                conn.execute("DELETE FROM spilled WHERE session = ?", (session,))
+            else:
+                conn.executemany("DELETE FROM spilled WHERE session = ? AND key = ?", [(session, k) for k in keys])
+
+
+class SessionData:
+    """Dict-like store of one session's large values; see the module docstring."""
+
+    def __init__(self, session, store):
+        self.session = session
+        self.store = store
+        # the job whose sections were loaded here (app.sync_job)
+        self.job_id = None
+        self.touched = time.time()
+        self._lock = threading.Lock()
+        self._values = {}
+        self._read = {}
+        # key -> (size in memory when spilled, compressed size on disk)
+        self._spilled = {}
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._values or key in self._spilled
+
+    def __getitem__(self, key):
+        now = time.time()
+        with self._lock:
+            self.touched = now
+            if key in self._values:
+                self._read[key] = now
+                return self._values[key]
+            if key not in self._spilled:
+                raise KeyError(key)
+        value = self.store.get(self.session, key)
+        if value is None:
+            # the store lost it (another process pruned it); treat it as never set
+            with self._lock:
+                self._spilled.pop(key, None)
+            raise KeyError(key)
+        if sys.getsizeof(value) < SPILL_MIN_BYTES:
+            # small values idled out; keep them in memory again while in use
+            with self._lock:
+                self._values[key], self._read[key] = value, now
+                self._spilled.pop(key, None)
+            self.store.delete(self.session, [key])
+        return value
+
+    def get(self, key, default=""):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        size = sys.getsizeof(value)
+        if size >= SPILL_MIN_BYTES:
+            stored = self.store.put(self.session, key, value)
+            with self._lock:
+                self._values.pop(key, None)
+                self._read.pop(key, None)
+                self._spilled[key] = (size, stored)
+                self.touched = time.time()
+            return
+        with self._lock:
+            was_spilled = self._spilled.pop(key, None) is not None
+            self._values[key] = value
+            self._read[key] = self.touched = time.time()
+        if was_spilled:
+            self.store.delete(self.session, [key])
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def keys(self):
+        with self._lock:
+            return [*self._values, *self._spilled]
+
+    def drop(self, prefix):
+        """Forget every key starting with `prefix`."""
+        with self._lock:
+            for key in [k for k in self._values if k.startswith(prefix)]:
+                del self._values[key]
+                self._read.pop(key, None)
+            spilled = [k for k in self._spilled if k.startswith(prefix)]
+            for key in spilled:
+                del self._spilled[key]
+        if spilled:
+            self.store.delete(self.session, spilled)
+
+    def spill_idle(self, cutoff):
+        # move values not read since `cutoff` to disk; returns the bytes freed
+        with self._lock:
+            idle = [(k, self._values[k]) for k, t in self._read.items() if t < cutoff]
+        freed = 0
+        for key, value in idle:
+            stored = self.store.put(self.session, key, value)
+            with self._lock:
+                # skip values that were replaced while being written
+                if self._values.get(key) is not value:
+                    continue
+                del self._values[key], self._read[key]
+                self._spilled[key] = (sys.getsizeof(value), stored)
+            freed += sys.getsizeof(value)
+        return freed
+
+    def usage(self):
+        with self._lock:
+            return {
+                "memory_bytes": sum(sys.getsizeof(v) for v in self._values.values()),
+                "disk_bytes": sum(stored for _, stored in self._spilled.values()),
+                "spilled_bytes": sum(size for size, _ in self._spilled.values()),
+                "keys": len(self._values) + len(self._spilled),
+                "idle_seconds": time.time() - self.touched,
+            }
+
+
+class SessionMemory:
+    def __init__(self, store=None, idle_seconds=IDLE_SPILL_SECONDS, ttl=SESSION_TTL):
+        self.store = store or SpillStore(ttl=ttl)
+        self.idle_seconds = idle_seconds
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def for_session(self, session):
+        with self._lock:
+            data = self._sessions.get(session)
+            if data is None:
+                data = self._sessions[session] = SessionData(session, self.store)
+            data.touched = time.time()
+            due = time.time() - self._last_sweep >= SWEEP_INTERVAL
+            if due:
+                self._last_sweep = time.time()
+        if due:
+            self.sweep()
+        return data
+
+    def sweep(self):
+        """Spill idle values and forget expired sessions; returns the bytes freed."""
+        now = time.time()
+        with self._lock:
+            expired = [s for s, d in self._sessions.items() if now - d.touched > self.ttl]
+            for session in expired:
+                del self._sessions[session]
+            live = list(self._sessions.values())
+        for session in expired:
+            self.store.delete(session)
+        return sum(data.spill_idle(now - self.idle_seconds) for data in live)
+
+    def usage(self, tasks=()):
+        """[{"session", "memory_bytes", "disk_bytes", ...}, ...], largest in memory first.
+
+        `tasks` are the registries of background work (anything with a
+        `memory_usage()` of {session: bytes}); what they hold for a session
+        is counted in its "task_bytes" and in its "memory_bytes".
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        rows = {data.session: dict(data.usage(), session=data.session, task_bytes=0) for data in sessions}
+        for source in tasks:
+            for session, size in source.memory_usage().items():
+                row = rows.setdefault(session, {
+                    "session": session, "memory_bytes": 0, "disk_bytes": 0, "spilled_bytes": 0, "keys": 0,
+                    "idle_seconds": None, "task_bytes": 0,
+                })
+                row["task_bytes"] += size
+                row["memory_bytes"] += size
+        return sorted(rows.values(), key=lambda r: -r["memory_bytes"])
+
+
+class SessionRegistry:
+    """The latest background task of each session: a ranking, a prefetch, an export.
+
+    An entry expires `ttl` seconds after its session last looked it up, and
+    past `max_sessions` entries the least recently used goes first.
+    `on_evict` is called with every entry that expires or is replaced.
+    """
+
+    def __init__(self, ttl=TASK_TTL, max_sessions=MAX_TASK_SESSIONS, on_evict=None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # session -> [value, last used], least recently used first
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        # caller holds the lock; returns the dropped values
+        dropped = []
+        while self._entries:
+            session, (value, used) = next(iter(self._entries.items()))
+            if now - used <= self.ttl and len(self._entries) <= self.max_sessions:
+                break
+            del self._entries[session]
+            dropped.append(value)
+        return dropped
+
+    def _evict(self, values):
+        if self.on_evict is not None:
+            for value in values:
+                self.on_evict(value)
+
+    def get(self, session):
+        now = time.time()
+        with self._lock:
+            dropped = self._expire(now)
+            entry = self._entries.get(session)
+            if entry is not None:
+                entry[1] = now
+                self._entries.move_to_end(session)
+        self._evict(dropped)
+        return entry[0] if entry is not None else None
+
+    def put(self, session, value):
+        now = time.time()
+        with self._lock:
+            previous = self._entries.pop(session, None)
+            self._entries[session] = [value, now]
+            dropped = self._expire(now)
+        self._evict(([previous[0]] if previous is not None else []) + dropped)
+
+    def pop(self, session, value=None):
+        """Remove the session's entry, or only `value` if given; returns what was removed."""
+        with self._lock:
+            entry = self._entries.get(session)
+            if entry is None or (value is not None and entry[0] is not value):
+                return None
+            del self._entries[session]
+        return entry[0]
+
+    def items(self):
+        with self._lock:
+            return [(session, value) for session, (value, _) in self._entries.items()]
+
+    def memory_usage(self):
+        # {session: bytes}, from each value's memory_bytes() where it has one
+        return {session: value.memory_bytes() for session, value in self.items() if hasattr(value, "memory_bytes")}
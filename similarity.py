@@ -0,0 +1,110 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from instrumentation import stage
+
+CACHE_ENTRIES = 256
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can
+could did do does each for from had has have having he her here his how i if in
+into is it its just may me more most must my no nor not of on once only or other
+our out over own per same she should so some such than that the their them then
+there these they this those through to too under until up very was we were what
+when where which while who whom why will with within would you your
+""".split())
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _ids(tokens, vocab):
+    return np.fromiter(
+        (vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int64, count=len(tokens)
+    )
+
+
+def _tfidf_cosine(ia, ib, n_terms):
+    # TF-IDF over the two-document corpus, sublinear tf and smoothed idf
+    if not len(ia) or not len(ib):
+        return 0.0
+    counts = np.vstack([np.bincount(ia, minlength=n_terms), np.bincount(ib, minlength=n_terms)])
+    present = counts > 0
+    tf = np.zeros(counts.shape)
+    np.log(counts, out=tf, where=present)
+    tf[present] += 1.0
+    vecs = tf * (np.log(3.0 / (1.0 + present.sum(axis=0))) + 1.0)
+    norms = np.linalg.norm(vecs, axis=1)
+    return float(vecs[0] @ vecs[1] / (norms[0] * norms[1]))
+
+
+def _term_cosine(a_terms, b_terms):
+    vocab = {}
+    ia, ib = _ids(a_terms, vocab), _ids(b_terms, vocab)
+    return _tfidf_cosine(ia, ib, len(vocab))
+
+
+def _trigram_codes(tokens):
+    # pack each byte trigram into one integer without building substrings
+    b = np.frombuffer(f" {' '.join(tokens)} ".encode("utf-8"), dtype=np.uint8).astype(np.int64)
+    return (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+
+
+def _trigram_cosine(a_tokens, b_tokens):
+    ca, cb = _trigram_codes(a_tokens), _trigram_codes(b_tokens)
+    uniq, inverse = np.unique(np.concatenate([ca, cb]), return_inverse=True)
+    return _tfidf_cosine(inverse[:len(ca)], inverse[len(ca):], len(uniq))
+
+
+@lru_cache(maxsize=32)
+def _prepare(text):
+    # (tokens, content words, uni+bigram terms); cached so a JD scored against
+    # many resumes is tokenized once
+    tokens = tokenize(text)
+    words = [t for t in tokens if t not in STOPWORDS]
+    return tokens, words, words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def compute_scores(resume_text: str, jd_text: str) -> dict:
+    """Score how closely a resume matches a JD, all values in percent.
+
+    - tfidf: cosine of word unigram+bigram TF-IDF vectors
+    - ngram: cosine of character trigram TF-IDF vectors (robust to inflections)
+    - coverage: share of distinct JD content words that appear in the resume
+    """
+    r_tokens, r_words, r_terms = _prepare(resume_text)
+    j_tokens, j_words, j_terms = _prepare(jd_text)
+
+    jd_vocab = set(j_words)
+    coverage = len(jd_vocab & set(r_words)) / len(jd_vocab) if jd_vocab else 0.0
+    return {
+        "tfidf": 100 * _term_cosine(r_terms, j_terms),
+        "ngram": 100 * _trigram_cosine(r_tokens, j_tokens),
+        "coverage": 100 * coverage,
+    }
+
+
+def similarity_scores(resume_text: str, jd_text: str) -> dict:
+    # memoized per (resume, JD) content hash so Streamlit reruns are free
+    key = hashlib.sha256(f"{resume_text}\x00{jd_text}".encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    with stage("similarity"):
+        scores = compute_scores(resume_text, jd_text)
+    with _cache_lock:
+        _cache[key] = scores
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return scores
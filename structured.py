@@ -0,0 +1,119 @@
+import json
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from compaction import compact_pair
+from instrumentation import annotate, stage
+from llm import estimate_tokens, generate, get_cache
+from pipeline import section_prompts
+
+
+class AnalysisResult(BaseModel):
+    match_score: float = Field(ge=0, le=100)
+    success_rate: Optional[float] = Field(default=None, ge=0, le=100)
+    skill_gap: Optional[float] = Field(default=None, ge=0, le=100)
+    missing_keywords: List[str] = []
+    profile_summary: str = ""
+    recommendations: List[str] = []
+    tailored_resume: str = ""
+    cover_letter: str = ""
+    interview_questions: List[str] = []
+    skill_gap_analysis: str = ""
+    related_roles: List[str] = []
+    salary_estimate: str = ""
+    networking_tips: List[str] = []
+
+    def analysis_text(self) -> str:
+        # rendered in the ATS prompt's bullet layout for display and history
+        lines = [
+            f"- Job Description Match With Ats score: {self.match_score:.0f}%",
+            f"- Missing Keywords: {', '.join(self.missing_keywords) or 'None'}",
+            f"- Profile Summary: {self.profile_summary}",
+            "- Personalized suggestions for skills, keywords and achievements that can enhance the provided resume:",
+            *(f"- {r}" for r in self.recommendations),
+        ]
+        if self.success_rate is not None:
+            lines.append(f"- Application Success Rate: {self.success_rate:.0f}%")
+        if self.skill_gap is not None:
+            lines.append(f"- Skill Gap Percentage: {self.skill_gap:.0f}%")
+        return "\n".join(lines)
+
+    def to_sections(self) -> dict:
+        # same keys as the multi-prompt path, so session state and reports are shared
+        bullets = lambda items: "\n".join(f"- {i}" for i in items)
+        return {
+            "analysis": self.analysis_text(),
+            "recommendations": bullets(self.recommendations),
+            "tailored": self.tailored_resume.strip(),
+            "cover_letter": self.cover_letter.strip(),
+            "interview_qs": "\n".join(f"{n}. {q}" for n, q in enumerate(self.interview_questions, 1)),
+            "skill_gap": self.skill_gap_analysis.strip(),
+            "related_roles": bullets(self.related_roles),
+            "salary_estimate": self.salary_estimate.strip(),
+            "networking_tips": bullets(self.networking_tips),
+        }
+
+    def scores(self) -> dict:
+        return {
+            "Job Description Match": self.match_score,
+            "Application Success Rate": self.success_rate,
+            "Skill Gap Percentage": self.skill_gap,
+        }
+
+
+def build_structured_prompt(rt, jd):
+    rt, jd = compact_pair(rt, jd)
+    schema = json.dumps(AnalysisResult.model_json_schema()["properties"], indent=1)
+    return f"""
+You are an ATS and a professional resume writer with 10+ years experience.
+Analyze the resume against the job description and respond with ONE JSON object only,
+no Markdown fences, matching these properties:
+{schema}
+Guidance:
+- match_score, success_rate and skill_gap are percentages between 0 and 100.
+- recommendations: personalized suggestions for skills, keywords and achievements.
+- tailored_resume: a fully tailored version of the ORIGINAL resume for this JD.
+- cover_letter: a one-page cover letter.
+- interview_questions: 5 likely interview questions.
+- skill_gap_analysis: bullet points comparing the resume's skills to the JD requirements.
+- related_roles: 3 related job titles. salary_estimate: a USD salary range.
+- networking_tips: 3 networking tips for this JD.
+ORIGINAL:
+{rt}
+JD:
+{jd}
+"""
+
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_result(text: str) -> AnalysisResult:
+    body = _FENCE_RE.sub("", text.strip())
+    # tolerate chatter around the object
+    start, end = body.find("{"), body.rfind("}")
+    if start != -1 and end > start:
+        body = body[start:end + 1]
+    return AnalysisResult.model_validate_json(body)
+
+
+def run_structured(model_name, rt, jd):
+    """Generate every section with a single call; returns `(result, error)`."""
+    prompt = build_structured_prompt(rt, jd)
+    try:
+        with stage("llm:structured", model=model_name):
+            text = generate(model_name, prompt)
+            # what the same pair would have cost as one prompt per section
+            multi_in = sum(estimate_tokens(p) for p in section_prompts(rt, jd).values())
+            annotate(tokens_multi_in=multi_in, tokens_saved=multi_in - estimate_tokens(prompt))
+        result = parse_result(text)
+    except ValidationError as exc:
+        # don't let a malformed response be replayed from the cache
+        if get_cache():
+            get_cache().delete(model_name, prompt)
+        return None, f"Structured response did not match the schema: {exc.error_count()} errors"
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+    return result, None
@@ -0,0 +1,48 @@
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation  # noqa: E402
+import llm  # noqa: E402
+
+
+class FakeModel:
+    """Answers every prompt with `answer(prompt)` after `delay(prompt)` seconds, offline."""
+
+    def __init__(self):
+        self.delay = lambda prompt: 0.0
+        self.answer = lambda prompt: f"answer to {prompt.strip()[:20]}"
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls.append(prompt)
+        time.sleep(self.delay(prompt))
+        text = self.answer(prompt)
+        if stream:
+            return [types.SimpleNamespace(text=text)]
+        return types.SimpleNamespace(text=text, usage_metadata=None)
+
+
+@pytest.fixture(autouse=True)
+def offline(tmp_path, monkeypatch):
+    # metrics into the test's directory, no response cache, no rate limits
+    monkeypatch.setattr(instrumentation, "sink", instrumentation.MetricsSink(str(tmp_path / "metrics.jsonl")))
+    monkeypatch.setattr(instrumentation, "write_prometheus", lambda *args, **kwargs: None)
+    monkeypatch.setattr(llm, "scheduler", llm.FairScheduler(10**6, 10**9))
+    monkeypatch.setattr(llm, "latencies", llm.LatencyTracker())
+    monkeypatch.setattr(llm, "_cache", False)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeModel()
+    monkeypatch.setattr(llm, "get_model", lambda model_name: fake)
+    return fake
@@ -0,0 +1,61 @@
+import json
+
+from fpdf import FPDF
+
+import batch
+from batch import load_checkpoint
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + '{"resume": "torn', encoding="utf-8")
+
+
+def test_checkpoint_retries_failed_pairs_and_requested_sections(tmp_path):
+    out = tmp_path / "out.jsonl"
+    _write(out, [
+        {"resume": "a.pdf", "jd": "x.txt", "errors": {}},
+        {"resume": "b.pdf", "jd": "x.txt", "errors": {"analysis": "Timeout"}},
+        {"resume": "c.pdf", "jd": "x.txt", "errors": {"tailored": "boom"}},
+        {"resume": "d.pdf", "jd": "x.txt", "error": "PDF has 80 pages; the limit is 50."},
+    ])
+    assert load_checkpoint(str(out), ["analysis"]) == {("a.pdf", "x.txt"), ("c.pdf", "x.txt")}
+    assert load_checkpoint(str(out), ["analysis", "tailored"]) == {("a.pdf", "x.txt")}
+    assert load_checkpoint(str(out)) == {("a.pdf", "x.txt"), ("b.pdf", "x.txt"), ("c.pdf", "x.txt")}
+
+
+def test_checkpoint_counts_a_later_success(tmp_path):
+    out = tmp_path / "out.jsonl"
+    _write(out, [
+        {"resume": "a.pdf", "jd": "x.txt", "errors": {"analysis": "Timeout"}},
+        {"resume": "a.pdf", "jd": "x.txt", "errors": {}},
+    ])
+    assert load_checkpoint(str(out), ["analysis"]) == {("a.pdf", "x.txt")}
+
+
+def test_missing_checkpoint_is_empty(tmp_path):
+    assert load_checkpoint(str(tmp_path / "none.jsonl")) == set()
+
+
+def test_offline_run_with_reports_then_resume(tmp_path):
+    resumes, jds, reports = tmp_path / "r", tmp_path / "j", tmp_path / "reports"
+    resumes.mkdir()
+    jds.mkdir()
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    pdf.cell(0, 10, "Python developer with Docker and AWS")
+    pdf.output(str(resumes / "jane.pdf"))
+    (jds / "backend.txt").write_text("Backend engineer: Python, AWS, Kubernetes.", encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    argv = [str(resumes), str(jds), "-o", str(out), "--sections", "none", "--reports", str(reports),
+            "--workers", "2"]
+
+    assert batch.main(argv) == 0
+    [record] = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert "error" not in record
+    assert record["report"] == str(reports / "jane__backend.pdf")
+    assert (reports / "jane__backend.pdf").read_bytes().startswith(b"%PDF")
+
+    # a rerun finds the pair in the checkpoint and scores nothing
+    assert batch.main(argv) == 0
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 1
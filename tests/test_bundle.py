@@ -0,0 +1,65 @@
+import hashlib
+import io
+import json
+import threading
+import zipfile
+
+from bundle import MANIFEST_NAME, Exporter
+
+
+def _build(files, manifest=None, store=None):
+    store = {} if store is None else store
+    export = Exporter(workers=2).start("s", store, "artifact:bundle", files, manifest or {"job": "j1"})
+    export.future.result(timeout=10)
+    return export, store
+
+
+def test_manifest_lists_every_file_with_size_and_hash():
+    files = [
+        ("resume.pdf", "artifact:resume", b"%PDF resume"),
+        ("full_report.docx", "artifact:docx", lambda: b"docx bytes"),
+        ("cover_letter.pdf", "artifact:cover", lambda: b"%PDF cover"),
+    ]
+    export, store = _build(files, {"job": "j1", "scores": {"Job Match %": "72%"}})
+    assert export.error is None and export.done()
+    archive = zipfile.ZipFile(io.BytesIO(store["artifact:bundle"]))
+    manifest = json.loads(archive.read(MANIFEST_NAME))
+    assert manifest["job"] == "j1" and manifest["scores"] == {"Job Match %": "72%"} and manifest["created"]
+    # in bundle order, whatever order they were rendered in
+    assert [f["name"] for f in manifest["files"]] == ["resume.pdf", "full_report.docx", "cover_letter.pdf"]
+    for entry in manifest["files"]:
+        data = archive.read(entry["name"])
+        assert entry["bytes"] == len(data) and entry["sha256"] == hashlib.sha256(data).hexdigest()
+    # PDFs and DOCX files are stored as they are, the manifest is deflated
+    kinds = {info.filename: info.compress_type for info in archive.infolist()}
+    assert kinds["resume.pdf"] == kinds["full_report.docx"] == zipfile.ZIP_STORED
+    assert kinds[MANIFEST_NAME] == zipfile.ZIP_DEFLATED
+
+
+def test_rendered_files_are_saved_for_their_own_downloads():
+    _, store = _build([("resume.pdf", "artifact:resume", b"given"),
+                       ("cover_letter.pdf", "artifact:cover", lambda: b"rendered")])
+    assert store["artifact:cover"] == b"rendered"
+    assert "artifact:resume" not in store  # already prepared by the session
+
+
+def test_failed_render_reports_an_error_and_writes_no_bundle():
+    def broken():
+        raise ValueError("font missing")
+    export, store = _build([("resume.pdf", "artifact:resume", b"ok"), ("full_report.pdf", "artifact:r", broken)])
+    assert export.error == "font missing"
+    assert "artifact:bundle" not in store
+    assert export.memory_bytes() == 0
+
+
+def test_running_export_is_reused_and_a_finished_one_restarts():
+    release = threading.Event()
+    exporter = Exporter(workers=1)
+    files = [("a.pdf", "artifact:a", lambda: release.wait(10) and b"a")]
+    first = exporter.start("s", {}, "artifact:bundle", files, {})
+    assert exporter.start("s", {}, "artifact:bundle", files, {}) is first
+    release.set()
+    first.future.result(timeout=10)
+    again = exporter.start("s", {}, "artifact:bundle", files, {})
+    assert again is not first
+    again.future.result(timeout=10)
@@ -0,0 +1,56 @@
+from compaction import PAGE_BREAK, TRUNCATION_NOTE, clean_text, compact_jd, compact_pair, fit_to_budget
+from llm import estimate_tokens
+
+
+def _section(heading, line, count):
+    return "\n".join([heading] + [f"{line} {i}" for i in range(count)])
+
+
+def test_short_texts_are_unchanged():
+    rt, jd = "Jane Doe\nSKILLS\nPython, SQL", "Requirements:\nPython"
+    assert compact_pair(rt, jd, budget=1000) == (rt, jd)
+
+
+def test_running_headers_and_page_numbers_are_removed():
+    pages = [f"Jane Doe - Resume\nline {n} of the body\n{n + 1}" for n in range(3)]
+    text = clean_text(PAGE_BREAK.join(pages))
+    assert text.count("Jane Doe - Resume") == 1
+    assert "line 2 of the body" in text
+    assert "\n3" not in text
+
+
+def test_fit_to_budget_stays_within_budget():
+    text = _section("EXPERIENCE", "Built and ran backend services in production", 200)
+    for budget in (50, 300, 1000):
+        fitted = fit_to_budget(text, budget)
+        assert estimate_tokens(fitted) <= budget
+        assert fitted.endswith(TRUNCATION_NOTE)
+
+
+def test_low_value_sections_go_first():
+    experience = _section("EXPERIENCE", "Led the migration of the billing platform", 20)
+    text = "\n".join(["Jane Doe", _section("REFERENCES", "Available on request from a previous manager", 20),
+                      experience])
+    fitted = fit_to_budget(text, estimate_tokens("Jane Doe\n" + experience) + 5)
+    assert fitted.startswith("Jane Doe")
+    assert "Led the migration of the billing platform 19" in fitted
+    assert "Available on request" not in fitted
+
+
+def test_pair_budget_is_shared():
+    rt = _section("EXPERIENCE", "Shipped data pipelines for analytics teams", 300)
+    jd = _section("Requirements:", "Experience with streaming systems at scale", 300)
+    budget = 1000
+    short_rt, short_jd = compact_pair(rt, jd, budget)
+    assert estimate_tokens(short_rt) + estimate_tokens(short_jd) <= budget
+    # both over budget: the JD gets its share, the resume the rest
+    assert estimate_tokens(short_jd) <= 0.4 * budget < estimate_tokens(short_rt)
+
+
+def test_short_resume_leaves_the_rest_to_the_jd():
+    rt = "Jane Doe\nSKILLS\nPython"
+    jd = _section("Requirements:", "Experience with streaming systems at scale", 300)
+    short_rt, short_jd = compact_pair(rt, jd, 1000)
+    assert short_rt == rt
+    assert 0.9 * (1000 - estimate_tokens(rt)) < estimate_tokens(short_jd) <= 1000 - estimate_tokens(rt)
+    assert compact_jd(jd, 1000) != jd
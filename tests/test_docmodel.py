@@ -0,0 +1,34 @@
+from docmodel import parse, text_lines
+
+
+def lines(text, style="text"):
+    return text_lines(parse(text), style)
+
+
+def test_markers_and_emphasis_are_stripped():
+    assert lines("# **Title**\n- one\n* two\n• three\nplain") == ["Title", "• one", "• two", "• three", "plain"]
+
+
+def test_numbered_items_keep_their_source_numbers():
+    assert lines("3. third\n4) fourth") == ["3. third", "4. fourth"]
+
+
+def test_numbering_restarts_at_headings_and_bullets():
+    text = "intro\n# First\nalpha\nbeta\n# Second\ngamma\n- note\ndelta"
+    assert lines(text, "numbered") == [
+        "1. intro", "First", "1. alpha", "2. beta", "Second", "1. gamma", "• note", "1. delta",
+    ]
+
+
+def test_list_sections_stay_one_list_across_blank_lines():
+    assert lines("first question\n\nsecond question\n\n", "numbered") == ["1. first question", "2. second question"]
+    assert lines("one\n\ntwo", "bullet") == ["• one", "• two"]
+
+
+def test_text_sections_restart_numbering_at_blank_lines():
+    assert lines("1. a\n\n1. b") == ["1. a", "", "1. b"]
+    assert lines("para\n\nmore") == ["para", "", "more"]
+
+
+def test_paragraphs_count_on_from_numbered_items():
+    assert lines("1. first\nsecond\n5. fifth\nsixth", "numbered") == ["1. first", "2. second", "5. fifth", "6. sixth"]
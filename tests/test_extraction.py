@@ -0,0 +1,61 @@
+import sys
+
+import pytest
+from fpdf import FPDF
+
+import extraction
+from extraction import ExtractionError, extract_text
+
+
+def _pdf(pages, lines=0):
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=12)
+    for n in range(pages):
+        pdf.add_page()
+        pdf.cell(0, 10, f"Page {n + 1} text", ln=1)
+        for i in range(lines):
+            pdf.cell(0, 5, f"Line {i} of filler text on page {n + 1}", ln=1)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(extraction, "_cache", type(extraction._cache)())
+
+
+def test_parallel_extraction_keeps_main_module():
+    main = sys.modules["__main__"]
+    text = extract_text(_pdf(12))
+    assert sys.modules["__main__"] is main
+    assert "Page 1 text" in text and "Page 12 text" in text
+    # pages come back in order, separated by form feeds
+    assert text.split("\n\f")[11].strip() == "Page 12 text"
+
+
+def test_results_are_cached_by_content(monkeypatch):
+    data = _pdf(1)
+    assert extract_text(data) == "Page 1 text"
+    monkeypatch.setattr(extraction, "_read_in_worker", lambda *args: pytest.fail("not cached"))
+    assert extract_text(data) == "Page 1 text"
+
+
+def test_size_limit():
+    with pytest.raises(ExtractionError, match="limit is 1 MB"):
+        extract_text(b"%PDF" + b"0" * 2 * 1024 * 1024, max_bytes=1024 * 1024)
+
+
+def test_page_limit():
+    with pytest.raises(ExtractionError, match="3 pages; the limit is 2"):
+        extract_text(_pdf(3), max_pages=2)
+
+
+def test_page_deadline():
+    with pytest.raises(ExtractionError, match="took longer than"):
+        extract_text(_pdf(6, lines=50), page_timeout=1e-6)
+    # the timed-out workers were replaced; the next request still works
+    assert extract_text(_pdf(1)) == "Page 1 text"
+
+
+def test_unreadable_file():
+    with pytest.raises(ExtractionError, match="Could not read PDF"):
+        extract_text(b"not a pdf")
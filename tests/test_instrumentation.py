@@ -0,0 +1,39 @@
+import instrumentation
+from instrumentation import MetricsSink, prometheus_text, stage, summarize
+
+
+def _series(text, name):
+    return {line.split(" ")[0]: float(line.split(" ")[1]) for line in text.splitlines() if line.startswith(name)}
+
+
+def test_prometheus_counters_keep_growing_past_the_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "sink", MetricsSink(str(tmp_path / "m.jsonl"), window=3))
+    for _ in range(5):
+        with stage("llm:test") as record:
+            record.update(tokens_in=10, cache_hit=True)
+    assert summarize()["llm:test"]["count"] == 3
+    text = prometheus_text()
+    assert _series(text, "pathpinpoint_stage_seconds_count")['pathpinpoint_stage_seconds_count{stage="llm:test"}'] == 5
+    assert _series(text, "pathpinpoint_llm_tokens_in_total")['pathpinpoint_llm_tokens_in_total{stage="llm:test"}'] == 50
+    assert _series(text, "pathpinpoint_llm_cache_hits_total")['pathpinpoint_llm_cache_hits_total{stage="llm:test"}'] == 5
+    assert 'pathpinpoint_stage_seconds{stage="llm:test",quantile="0.95"}' in text
+
+
+def test_window_is_seeded_from_the_file(tmp_path):
+    path = str(tmp_path / "m.jsonl")
+    sink = MetricsSink(path)
+    for n in range(4):
+        sink.write({"stage": "s", "seconds": n})
+    # a restarted process sees the recent records but starts its counters at zero
+    restarted = MetricsSink(path, window=2)
+    assert [r["seconds"] for r in restarted.records()] == [2, 3]
+    assert restarted.totals() == {}
+
+
+def test_file_rotates_past_max_bytes(tmp_path):
+    path = str(tmp_path / "m.jsonl")
+    sink = MetricsSink(path, max_bytes=200)
+    for n in range(10):
+        sink.write({"stage": "s", "seconds": n})
+    assert (tmp_path / "m.jsonl.1").exists()
+    assert [r["seconds"] for r in MetricsSink(path, window=10).records()][-1] == 9
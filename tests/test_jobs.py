@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+import jobs
+import pipeline
+from benchmarks.fake_gemini import ATS_RESPONSE
+
+RESUME = "Jane Doe\nEXPERIENCE\nBackend engineer, Python and AWS, five years."
+JD = "Backend engineer. Requirements: Python, AWS, Kubernetes."
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+@pytest.fixture
+def runner(store, model):
+    model.answer = lambda prompt: (ATS_RESPONSE.format(score=70, success=60, gap=20)
+                                   if prompt.lstrip().startswith("You are an ATS") else "- a section")
+    runner = jobs.JobRunner(store=store)
+    yield runner
+    runner.stop()
+
+
+def _wait(store, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] not in jobs.ACTIVE:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job still {store.get(job_id)['status']}")
+
+
+def _orphan(store, job_id, owner="gone", age=jobs.JOB_LEASE + 1):
+    # as left by a runner that stopped heartbeating `age` seconds ago
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET status = 'running', owner = ?, heartbeat = ? WHERE id = ?",
+                     (owner, time.time() - age, job_id))
+
+
+def test_sections_past_their_deadline_are_pending(runner, store, model, monkeypatch):
+    monkeypatch.setattr(pipeline, "DEFAULT_SECTION_DEADLINE", 0.3)
+    model.delay = lambda prompt: 1.0 if prompt.lstrip().startswith("You are an ATS") else 0.0
+    job = _wait(store, runner.submit("s", RESUME, JD, "m"))
+    assert job["status"] == "done"
+    # the ATS prompt timed out: local scores stand in and it can be sent again
+    assert job["errors"]["analysis"] == jobs.PENDING_ANALYSIS
+    assert job["sections"]["analysis"]
+    assert job["sections"]["cover_letter"] == "- a section"
+
+
+def test_failed_structured_call_falls_back_to_section_prompts(runner, store, model):
+    job = _wait(store, runner.submit("s", RESUME, JD, "m", mode="structured"))
+    assert job["status"] == "done"
+    # the fake answers the JSON prompt with bullets, so every section went out on its own
+    assert job["errors"] == {}
+    assert set(pipeline.SECTION_LABELS) <= set(job["sections"])
+    assert len(model.calls) == 1 + len(pipeline.build_prompts(RESUME, JD))
+
+
+def test_resume_picks_up_orphaned_job_and_keeps_saved_sections(runner, store, model):
+    job_id = store.create("s", "parallel", "m", 2, RESUME, JD, owner="gone")
+    store.save_section(job_id, "cover_letter", "saved before the restart")
+    _orphan(store, job_id)
+    assert runner.resume_unfinished() == [job_id]
+    job = _wait(store, job_id)
+    assert job["status"] == "done"
+    assert job["sections"]["cover_letter"] == "saved before the restart"
+    assert not any("cover letter" in prompt.lower() for prompt in model.calls)
+
+
+def test_resume_skips_jobs_a_live_runner_holds(runner, store, model):
+    job_id = store.create("s", "parallel", "m", 2, RESUME, JD, owner="other")
+    _orphan(store, job_id, owner="other", age=1)
+    assert runner.resume_unfinished() == []
+    assert not store.claim(job_id, runner.owner)
+    assert model.calls == []
+
+
+def test_only_one_runner_claims_a_job(store):
+    job_id = store.create("s", "parallel", "m", 2, RESUME, JD)
+    assert store.claim(job_id, "a")
+    assert not store.claim(job_id, "b")
+    assert store.claim(job_id, "a")
+    store.update(job_id, "done")
+    assert not store.claim(job_id, "a")
+
+
+def test_purge_drops_only_old_finished_jobs(store):
+    old, active = (store.create("s", "parallel", "m", 2, RESUME, JD) for _ in range(2))
+    store.save_section(old, "analysis", "text")
+    store.update(old, "done")
+    assert store.purge(max_age=-1) == 1
+    assert store.get(old) is None
+    assert store.get(active)["status"] == "queued"
+
+
+def test_time_spent_queued_counts_against_the_budget():
+    now = time.monotonic()
+    deadlines = pipeline.section_deadlines(["analysis"], budget=5, since=time.time() - 10)
+    assert deadlines["analysis"] <= now
+    assert pipeline.section_deadlines(["analysis"], budget=5)["analysis"] > now + 4
+
+
+def test_adopted_job_gets_a_fresh_budget(store):
+    job_id = store.create("s", "parallel", "m", 2, RESUME, JD, owner="gone")
+    _orphan(store, job_id, age=3600)
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET queued_at = ? WHERE id = ?", (time.time() - 3600, job_id))
+    assert store.claim(job_id, "new")
+    assert time.time() - store.get(job_id)["queued_at"] < 5
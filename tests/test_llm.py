@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+import instrumentation
+import llm
+from llm_cache import ResponseCache
+
+
+def _deadlines(**seconds):
+    now = time.monotonic()
+    return {key: now + s for key, s in seconds.items()}
+
+
+def test_fan_out_leaves_sections_past_their_deadline_pending(model):
+    model.delay = lambda prompt: 2.0 if prompt == "slow" else 0.0
+    started = time.monotonic()
+    results, errors = llm.fan_out("m", {"fast": "fast", "slow": "slow"},
+                                  deadlines=_deadlines(fast=5, slow=0.2))
+    assert time.monotonic() - started < 1.5
+    assert results == {"fast": "answer to fast"}
+    assert errors == {}
+
+
+def test_fan_out_failure_does_not_cancel_siblings(model):
+    def answer(prompt):
+        if prompt == "bad":
+            raise ValueError("boom")
+        return "ok"
+    model.answer = answer
+    results, errors = llm.fan_out("m", {"a": "a", "bad": "bad", "b": "b"})
+    assert results == {"a": "ok", "b": "ok"}
+    assert errors == {"bad": "ValueError: boom"}
+
+
+def test_stream_fan_out_reports_pending_once(model):
+    model.delay = lambda prompt: 2.0 if prompt == "slow" else 0.0
+    events = list(llm.stream_fan_out("m", {"fast": "fast", "slow": "slow"},
+                                     deadlines=_deadlines(fast=5, slow=0.2)))
+    assert ("fast", "done", "answer to fast") in events
+    assert [e for e in events if e[0] == "slow"] == [("slow", "pending", None)]
+
+
+def _slow_p95(monkeypatch, stream=False):
+    # a stage whose calls normally answer at once, so a slow one is hedged quickly
+    monkeypatch.setattr(llm, "HEDGE_MIN_DELAY", 0.05)
+    for _ in range(llm.HEDGE_MIN_SAMPLES):
+        llm.latencies.record(("m", "llm:test", stream), 0.01)
+
+
+def test_hedge_wins_over_a_stalled_call(monkeypatch):
+    _slow_p95(monkeypatch)
+    calls = []
+
+    def send():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(1.0)
+            return "first"
+        return "hedge"
+
+    started = time.monotonic()
+    with instrumentation.stage("llm:test") as record:
+        assert llm._hedged("m", "prompt", send) == "hedge"
+    assert time.monotonic() - started < 0.8
+    assert record["hedged"] and record["hedge_won"]
+
+
+def test_hedge_loser_failure_is_ignored(monkeypatch):
+    _slow_p95(monkeypatch)
+    calls = []
+
+    def send():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(0.3)
+            raise RuntimeError("stalled call failed")
+        time.sleep(0.5)
+        return "hedge"
+
+    with instrumentation.stage("llm:test") as record:
+        assert llm._hedged("m", "prompt", send) == "hedge"
+    assert record["hedge_won"]
+
+
+def test_hedge_raises_once_both_calls_fail(monkeypatch):
+    _slow_p95(monkeypatch)
+
+    def send():
+        time.sleep(0.2)
+        raise RuntimeError("down")
+
+    with instrumentation.stage("llm:test"), pytest.raises(RuntimeError):
+        llm._hedged("m", "prompt", send)
+
+
+def test_no_hedge_without_enough_samples():
+    calls = []
+
+    def send():
+        calls.append(None)
+        time.sleep(0.1)
+        return "only"
+
+    with instrumentation.stage("llm:test") as record:
+        assert llm._hedged("m", "prompt", send) == "only"
+    assert len(calls) == 1 and "hedged" not in record
+
+
+def test_identical_prompts_in_flight_share_one_call(model, monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite3")))
+    model.delay = lambda prompt: 0.3
+    texts = []
+    threads = [threading.Thread(target=lambda: texts.append(llm.generate("m", "same prompt")))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert texts == ["answer to same prompt"] * 3
+    assert len(model.calls) == 1
+
+
+def test_joined_caller_sends_its_own_call_when_the_owner_fails(model, monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, "_cache", ResponseCache(str(tmp_path / "cache.sqlite3")))
+    model.delay = lambda prompt: 0.2
+    key, event, owner, _ = llm._claim("m", "prompt")
+    assert owner
+    joined = []
+    thread = threading.Thread(target=lambda: joined.append(llm.generate("m", "prompt")))
+    thread.start()
+    time.sleep(0.1)
+    assert model.calls == []  # waiting on the owner
+    llm._release(key, event)  # the owner gave up without caching anything
+    thread.join()
+    assert joined == ["answer to prompt"] and len(model.calls) == 1
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 1  # every call is a distinct moment, so LRU order is exact
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def _body_size(text):
+    return len(llm_cache.zlib.compress(text.encode("utf-8")))
+
+
+def _text(n):
+    # incompressible enough that each entry has a predictable size
+    return os.urandom(300).hex() + str(n)
+
+
+def test_whitespace_and_line_endings_share_a_key():
+    assert cache_key("m", "a  \r\nb\n") == cache_key("m", "a\nb")
+    assert cache_key("m", "a") != cache_key("other", "a")
+
+
+def test_round_trip_and_stats(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"))
+    assert cache.get("m", "p") is None
+    cache.put("m", "p", "answer")
+    assert cache.get("m", "p ") == "answer"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_misses(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"), ttl=100)
+    cache.put("m", "p", "answer")
+    clock.now += 101
+    assert cache.get("m", "p") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_go_first(tmp_path, clock):
+    texts = [_text(n) for n in range(3)]
+    size = max(map(_body_size, texts))
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"), max_bytes=2 * size + size // 2)
+    cache.put("m", "a", texts[0])
+    cache.put("m", "b", texts[1])
+    assert cache.get("m", "a") == texts[0]  # b is now the least recently used
+    cache.put("m", "c", texts[2])
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == texts[0] and cache.get("m", "c") == texts[2]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_put_drops_expired_entries(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"), ttl=100)
+    cache.put("m", "old", "x")
+    clock.now += 101
+    cache.put("m", "new", "y")
+    assert cache.stats()["entries"] == 1
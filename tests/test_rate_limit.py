@@ -0,0 +1,49 @@
+import threading
+import time
+
+from rate_limit import FairScheduler
+
+
+def _queue(scheduler, session, granted, lock):
+    def acquire():
+        scheduler.acquire(session, 1)
+        with lock:
+            granted.append(session)
+    arrived = sum(scheduler.waiting().values()) + len(granted)
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    # let it take its place in line before the next caller arrives
+    while sum(scheduler.waiting().values()) + len(granted) <= arrived:
+        time.sleep(0.005)
+    return thread
+
+
+def test_sessions_take_turns():
+    scheduler = FairScheduler(rpm=1200, tpm=10**9)  # one request every 50ms once drained
+    scheduler.requests.level = 0
+    granted, lock = [], threading.Lock()
+    threads = [_queue(scheduler, session, granted, lock) for session in ("a", "a", "a", "b")]
+    for thread in threads:
+        thread.join(5)
+    # b's single request doesn't wait behind all of a's
+    assert granted == ["a", "b", "a", "a"]
+
+
+def test_token_budget_holds_back_requests():
+    scheduler = FairScheduler(rpm=10**6, tpm=600)  # 10 tokens a second
+    scheduler.acquire("a", 600)
+    started = time.monotonic()
+    scheduler.acquire("a", 5)
+    assert 0.3 < time.monotonic() - started < 2
+
+
+def test_waiting_counts_per_session():
+    scheduler = FairScheduler(rpm=60, tpm=10**9)
+    scheduler.requests.level = 0
+    threads = [threading.Thread(target=scheduler.acquire, args=(s, 1), daemon=True) for s in ("a", "a", "b")]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while scheduler.waiting() != {"a": 2, "b": 1} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.waiting() == {"a": 2, "b": 1}
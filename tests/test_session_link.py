@@ -0,0 +1,29 @@
+import session_link
+from session_link import sign, verify
+
+
+def test_round_trip():
+    assert verify(sign("abc123", "secret"), "secret") == "abc123"
+
+
+def test_other_secret_is_rejected():
+    assert verify(sign("abc123", "secret"), "other") is None
+
+
+def test_forged_session_or_expiry_is_rejected():
+    session, expires, signature = sign("abc123", "secret").split(".")
+    assert verify(f"someone-else.{expires}.{signature}", "secret") is None
+    assert verify(f"{session}.{int(expires) + 3600}.{signature}", "secret") is None
+    assert verify(f"{session}.{expires}.{'0' * len(signature)}", "secret") is None
+
+
+def test_expired_link_is_rejected(monkeypatch):
+    token = sign("abc123", "secret", ttl=60)
+    now = session_link.time.time()
+    monkeypatch.setattr(session_link.time, "time", lambda: now + 61)
+    assert verify(token, "secret") is None
+
+
+def test_malformed_tokens_are_rejected():
+    for token in (None, "", "abc123", "abc123.soon.sig", "a.b.c.d", "abc123..", sign("a.b", "secret")):
+        assert verify(token, "secret") is None
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from session_memory import SPILL_MIN_BYTES, SessionMemory, SessionRegistry, SpillStore
+
+LARGE = "x" * SPILL_MIN_BYTES
+PDF = b"%PDF" + bytes(SPILL_MIN_BYTES)
+
+
+@pytest.fixture
+def memory(tmp_path):
+    return SessionMemory(SpillStore(str(tmp_path / "spill.sqlite3")), idle_seconds=0)
+
+
+def test_large_values_go_straight_to_disk(memory):
+    texts = memory.for_session("s")
+    texts["tailored"], texts["artifact:report.pdf"], texts["analysis"] = LARGE, PDF, "short"
+    usage = texts.usage()
+    assert usage["keys"] == 3
+    assert usage["memory_bytes"] < SPILL_MIN_BYTES
+    assert usage["spilled_bytes"] > 2 * SPILL_MIN_BYTES
+    # reads load them back, bytes stay bytes
+    assert texts["tailored"] == LARGE and texts["artifact:report.pdf"] == PDF
+
+
+def test_idle_small_values_spill_and_come_back(memory):
+    texts = memory.for_session("s")
+    texts["analysis"] = "short"
+    time.sleep(0.01)
+    assert memory.sweep() > 0
+    assert texts.usage()["memory_bytes"] == 0
+    assert texts["analysis"] == "short"
+    # back in memory while in use
+    assert texts.usage()["disk_bytes"] == 0 and texts.usage()["memory_bytes"] > 0
+
+
+def test_overwrite_and_drop(memory):
+    texts = memory.for_session("s")
+    texts["artifact:a"] = PDF
+    texts["artifact:a"] = b"small"
+    assert texts["artifact:a"] == b"small" and texts.usage()["disk_bytes"] == 0
+    texts["artifact:b"], texts["resume_text"] = PDF, "resume"
+    texts.drop("artifact:")
+    assert texts.keys() == ["resume_text"]
+    assert "artifact:b" not in texts and texts.get("artifact:b") == ""
+
+
+def test_expired_sessions_are_forgotten(tmp_path):
+    memory = SessionMemory(SpillStore(str(tmp_path / "spill.sqlite3")), ttl=0)
+    memory.for_session("s")["tailored"] = LARGE
+    time.sleep(0.01)
+    memory.sweep()
+    assert memory.usage() == []
+    assert memory.store.get("s", "tailored") is None
+
+
+def test_registry_expires_and_evicts_least_recently_used():
+    evicted = []
+    registry = SessionRegistry(ttl=60, max_sessions=2, on_evict=evicted.append)
+    registry.put("a", "task a")
+    registry.put("b", "task b")
+    assert registry.get("a") == "task a"  # b is now the oldest
+    registry.put("c", "task c")
+    assert evicted == ["task b"] and registry.get("b") is None
+    registry.put("a", "task a2")  # replacing a task evicts the previous one
+    assert evicted == ["task b", "task a"]
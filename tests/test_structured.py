@@ -0,0 +1,37 @@
+import pytest
+from pydantic import ValidationError
+
+import structured
+from structured import parse_result
+
+
+def test_fenced_json_with_chatter():
+    text = 'Here you go:\n```json\n{"match_score": 72, "interview_questions": ["Why us?", "Why now?"]}\n```'
+    result = parse_result(text)
+    assert result.match_score == 72
+    assert result.to_sections()["interview_qs"] == "1. Why us?\n2. Why now?"
+
+
+def test_invalid_json_is_a_validation_error():
+    with pytest.raises(ValidationError):
+        parse_result('{"match_score": 72,')
+
+
+def test_out_of_range_score_is_a_validation_error():
+    with pytest.raises(ValidationError):
+        parse_result('{"match_score": 140}')
+
+
+def test_run_structured_reports_schema_errors(model):
+    model.answer = lambda prompt: "no JSON here"
+    result, error = structured.run_structured("m", "resume", "jd")
+    assert result is None
+    assert error.startswith("Structured response did not match the schema")
+
+
+def test_run_structured_splits_into_sections(model):
+    model.answer = lambda prompt: '{"match_score": 64, "cover_letter": " Dear team "}'
+    result, error = structured.run_structured("m", "resume", "jd")
+    assert error is None
+    assert result.scores()["Job Description Match"] == 64
+    assert result.to_sections()["cover_letter"] == "Dear team"